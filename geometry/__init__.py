@@ -4,8 +4,19 @@ from .handles import top, left, bottom, right, bottom_left, bottom_right, top_le
 from .handles import top_right, width, height, out, in_
 from .canvas import Canvas
 from .rect import Rect
-from .group import Group
+from .dbu import DbuRect
+from .group import Group, GroupArray
 from .path import Segment, Direction
+from .compact import CompactRect, CompactSegment
+from .rectarray import RectArray
+from .index import SpatialIndex
+from .transform import Transform
+from .plan import StretchPlan, TranslatePlan, stretch_many, translate_many
+from .view import ShapeView
+from .connect import Nets
+from .parallel import TileExecutor
+from .shared import ShapeTable
+from .gds import GdsReader
 
 
 __all__ = [
@@ -13,6 +24,7 @@ __all__ = [
     'Size',
     'Number',
     'Rect',
+    'DbuRect',
     'left',
     'right',
     'bottom',
@@ -27,6 +39,21 @@ __all__ = [
     'in_',
     'Canvas',
     'Group',
+    'GroupArray',
     'Segment',
     'Direction',
+    'CompactRect',
+    'CompactSegment',
+    'RectArray',
+    'SpatialIndex',
+    'Transform',
+    'StretchPlan',
+    'TranslatePlan',
+    'stretch_many',
+    'translate_many',
+    'ShapeView',
+    'Nets',
+    'TileExecutor',
+    'ShapeTable',
+    'GdsReader',
 ]
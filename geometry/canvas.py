@@ -1,12 +1,13 @@
-from typing import Any, Generator, List, Union, Optional, Callable, Dict
+from typing import Any, Generator, List, Union, Callable, Dict
 
 from .point import Number
-from .rect import Rect
-from .group import Group
-from .path import Segment
+from .rect import Rect, BaseRect
+from .group import Group, GroupArray
+from .path import Segment, BaseSegment
 from .mixins import AppendMany
+from .transform import Transform
 
-Shape = Union[Rect, Group, Segment]
+Shape = Union[Rect, Group, GroupArray, Segment]
 
 
 class Html:
@@ -190,6 +191,18 @@ class Canvas(AppendMany[Shape]):
     >>> with_group.html() == no_group.html()
     True
 
+    Groups and group arrays are walked without copying or moving their shapes,
+    see :meth:`Group.walk`. Group arrays are rendered cell by cell.
+
+    >>> with_array = Canvas(100, 200)
+    >>> with_array.append(group.grid(2, 'right', 1, 'up'))
+    >>> with_array.html() == with_group.html()
+    False
+    >>> copies = Canvas(100, 200)
+    >>> copies.append(group.grid(2, 'right', 1, 'up').flatten())
+    >>> with_array.html() == copies.html()
+    True
+
     If you try to render anything else, an error is raised
 
     >>> c = Canvas(100, 200)
@@ -315,24 +328,27 @@ class Canvas(AppendMany[Shape]):
 
         div.background = div.background or default
 
-    def _rect(self, rect: Union[Rect, Segment]) -> Generator[str, None, None]:
-        left = (rect.left + self.width / 2) * self.scale
-        bottom = (rect.bottom + self.height / 2) * self.scale
-        width = rect.width * self.scale
-        height = rect.height * self.scale
+    def _rect(
+        self, rect: Union[Rect, Segment], transform: Transform = Transform()
+    ) -> Generator[str, None, None]:
+        x, y, width, height = transform.rect(rect.x, rect.y, rect.width, rect.height)
+        left = (x - width / 2 + self.width / 2) * self.scale
+        bottom = (y - height / 2 + self.height / 2) * self.scale
+        width *= self.scale
+        height *= self.scale
         div = Html.div(position='absolute', left=left, bottom=bottom, width=width, height=height)
 
         div.box_sizing = 'border-box'
         self._set_style(div, rect.user_data, '', self.default_color)
         inner_code = ""
 
-        if isinstance(rect, Segment):
+        if isinstance(rect, BaseSegment):
             div.display = 'flex'
             div.align_items = 'center'
             div.justify_content = 'center'
 
             line = Html.div()
-            if rect.direction.is_horizontal:
+            if rect.direction.is_horizontal != transform.swaps_axes:
                 line.width = '100%'
                 line.height = 2
             else:
@@ -345,15 +361,13 @@ class Canvas(AppendMany[Shape]):
         yield inner_code
         yield div.close()
 
-    def _shapes(self, shapes: Optional[List[Shape]] = None) -> Generator[str, None, None]:
-        if shapes is None:
-            shapes = self.shapes
-
-        for shape in shapes:
-            if isinstance(shape, (Rect, Segment)):
+    def _shapes(self) -> Generator[str, None, None]:
+        for shape in self.shapes:
+            if isinstance(shape, BaseRect):
                 yield from self._rect(shape)
-            elif isinstance(shape, Group):
-                yield from self._shapes(shape.shapes)
+            elif isinstance(shape, (Group, GroupArray)):
+                for transform, leaf in shape.walk():
+                    yield from self._rect(leaf, transform)
             else:
                 raise ValueError(f"cannot draw unknown shape of class {shape.__class__}")
 
@@ -0,0 +1,147 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple
+
+from .rect import Rect
+from .index import SpatialIndex, Box, _box, _touches
+
+
+class _UnionFind:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first: int, second: int) -> None:
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+
+
+def _touching_pairs(boxes: List[Box]) -> Iterable[Tuple[int, int]]:
+    # like overlapping pairs, but shapes that share a piece of an edge count as well
+    index: SpatialIndex[int] = SpatialIndex._bulk_load_entries(
+        [(box, i) for i, box in enumerate(boxes)], 16
+    )
+    for i, box in enumerate(boxes):
+        left, bottom, right, top = box
+        for j in index._query_box(box, _touches):
+            if j < i:
+                other = boxes[j]
+                width = min(right, other[2]) - max(left, other[0])
+                height = min(top, other[3]) - max(bottom, other[1])
+                if width + height > 0:
+                    yield j, i
+
+
+@dataclass
+class Nets:
+    """
+    The result of :func:`connectivity`: every shape gets the id of its net, a number
+    from ``0`` to ``len(nets) - 1``.
+    """
+
+    shapes: List[Any]
+    ids: List[int]
+    bboxes: List[Rect]
+    # the net by the id of every shape and of the shape behind every view
+    _nets: Dict[int, int] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # like a scan over the shapes, the first match wins
+        self._nets = {}
+        for shape, net in zip(self.shapes, self.ids):
+            self._nets.setdefault(id(shape), net)
+            behind = getattr(shape, 'shape', None)
+            if behind is not None:
+                self._nets.setdefault(id(behind), net)
+
+    def __len__(self) -> int:
+        return len(self.bboxes)
+
+    def members(self, net: int) -> List[Any]:
+        """
+        All shapes of a net
+        """
+        return [shape for shape, id_ in zip(self.shapes, self.ids) if id_ == net]
+
+    def net_of(self, shape: Any) -> int:
+        """
+        The net of a shape, which may also be the shape behind a :class:`ShapeView`
+
+        >>> a, b = Rect[0:1, 0:1], Rect[5:6, 0:1]
+        >>> nets = connectivity([a, b])
+        >>> nets.net_of(b)
+        1
+        >>> nets.net_of(Rect[0:1, 0:1])
+        Traceback (most recent call last):
+        ...
+        ValueError: [0:1, 0:1] is not part of the nets
+        """
+        net = self._nets.get(id(shape))
+        if net is None:
+            raise ValueError(f"{shape} is not part of the nets")
+        return net
+
+
+def connectivity(shapes: Iterable[Any], connections: Iterable[Tuple[Any, Any]] = ()) -> Nets:
+    """
+    Group touching or overlapping shapes into nets. Shapes are connected if they are
+    on the same layer (i.e. have the same ``user_data``), or if their layers are
+    given as a pair in ``connections``. Shapes that only touch at a corner are not
+    connected.
+
+    Candidates are looked up in a :class:`SpatialIndex`, so shapes that are far apart
+    are never compared, and connected shapes are joined in a union-find structure.
+
+    >>> shapes = [
+    ...     Rect[0:4, 0:1, 'metal1'],
+    ...     Rect[3:4, 0:1, 'via'],
+    ...     Rect[3:8, 0:1, 'metal2'],
+    ...     Rect[8:9, 1:2, 'metal2'],
+    ...     Rect[0:1, 1:2, 'metal2'],
+    ... ]
+    >>> nets = connectivity(shapes, [('metal1', 'via'), ('via', 'metal2')])
+    >>> len(nets)
+    3
+    >>> nets.ids
+    [0, 0, 0, 1, 2]
+    >>> nets.bboxes
+    [[0:8, 0:1], [8:9, 1:2], [0:1, 1:2]]
+    """
+    shapes = list(shapes)
+    pairs: FrozenSet[Tuple[Any, Any]] = frozenset(
+        pair for first, second in connections for pair in ((first, second), (second, first))
+    )
+    layers = [getattr(shape, 'user_data', None) for shape in shapes]
+    boxes = [_box(shape) for shape in shapes]
+
+    union_find = _UnionFind(len(shapes))
+    for first, second in _touching_pairs(boxes):
+        first_layer, second_layer = layers[first], layers[second]
+        if first_layer == second_layer or (first_layer, second_layer) in pairs:
+            union_find.union(first, second)
+
+    roots: Dict[int, int] = {}
+    ids = [roots.setdefault(union_find.find(i), len(roots)) for i in range(len(shapes))]
+
+    merged: List[Box] = [[] for _ in roots]
+    for (left, bottom, right, top), net in zip(boxes, ids):
+        box = merged[net]
+        if not box:
+            box.extend((left, bottom, right, top))
+        else:
+            box[0] = min(box[0], left)
+            box[1] = min(box[1], bottom)
+            box[2] = max(box[2], right)
+            box[3] = max(box[3], top)
+    return Nets(shapes, ids, [Rect.from_edges(box[0], box[2], box[1], box[3]) for box in merged])
@@ -0,0 +1,294 @@
+from typing import Any, Optional, Tuple, Type, TypeVar, Union
+
+from .point import Number
+from .rect import Rect, BaseRect, InitTuple, _to_start_stop
+from .transform import Transform
+
+
+def _to_dbu(value: Number) -> int:
+    if isinstance(value, int):
+        return value
+    if value.is_integer():
+        return int(value)
+    raise ValueError(f"{value} is not on the database unit grid")
+
+
+def _half(value: int) -> Number:
+    # the center of a rect with an odd width is half way between two grid points
+    return value // 2 if value % 2 == 0 else value / 2
+
+
+def _span(center: Number, size: Number) -> Tuple[int, int]:
+    # the edges around a center, integers are not converted to float on the way
+    size = _to_dbu(size)
+    if isinstance(center, int) and size % 2 == 0:
+        low = center - size // 2
+    else:
+        low = _to_dbu(center - size / 2)
+    return low, low + size
+
+
+D = TypeVar('D', bound='DbuRect')
+
+
+class DbuRect(Rect):
+    """
+    A rect on the integer grid of database units (DBU).
+
+    Unlike :class:`Rect`, the four edges are stored as integers instead of the
+    center and size. Reading or changing edges and corners never creates a float.
+    Only the center of a rect with an odd width or height is not on the grid.
+    It is constructed like a rect, from its center and size.
+
+    >>> r = DbuRect(1.5, 1, 3, 2)
+    >>> r
+    [0:3, 0:2]
+    >>> r.left, r.right, r.width
+    (0, 3, 3)
+    >>> r.x
+    1.5
+    >>> r.top_right
+    (3, 2)
+
+    All the usual operations are available and keep the edges on the grid
+
+    >>> from geometry import Point, right
+    >>> r.stretch(right + 2).translate(bottom_left=Point(10, 10))
+    [10:15, 10:12]
+
+    Results that are not on the grid raise an error instead of being rounded
+
+    >>> r.width = 6
+    Traceback (most recent call last):
+    ...
+    ValueError: changing the width by 1 would move the edges off the database unit grid
+
+    >>> r.left = 0.5
+    Traceback (most recent call last):
+    ...
+    ValueError: 0.5 is not on the database unit grid
+
+    The fields are the same as those of a rect, so ``dataclasses.replace`` works as well
+
+    >>> from dataclasses import replace
+    >>> replace(DbuRect[0:2, 0:2, 'red'], x=5)
+    [4:6, 0:2] 'red'
+    """
+
+    def __init__(
+        self, x: Number, y: Number, width: Number, height: Number, user_data: Any = None
+    ) -> None:
+        assert width >= 0, "width must be positive"
+        assert height >= 0, "height must be positive"
+        self._left, self._right = _span(x, width)
+        self._bottom, self._top = _span(y, height)
+        self.user_data = user_data
+
+    @classmethod
+    def from_edges(
+        cls: Type[D],
+        left: Number,
+        right: Number,
+        bottom: Number,
+        top: Number,
+        user_data: Any = None,
+    ) -> D:
+        """
+        Construct a rect from the given edge coordinates
+
+        >>> DbuRect.from_edges(1, 3, 2, 4)
+        [1:3, 2:4]
+        """
+        assert right >= left, "width must be positive"
+        assert top >= bottom, "height must be positive"
+        rect = cls.__new__(cls)
+        rect._left, rect._right = _to_dbu(left), _to_dbu(right)
+        rect._bottom, rect._top = _to_dbu(bottom), _to_dbu(top)
+        rect.user_data = user_data
+        return rect
+
+    @classmethod
+    def from_rect(cls: Type[D], rect: BaseRect, user_data: Any = None) -> D:
+        """
+        Convert a rect whose edges are on the grid
+
+        >>> DbuRect.from_rect(Rect[0:2, 0:4, 'red'])
+        [0:2, 0:4] 'red'
+        """
+        if user_data is None:
+            user_data = getattr(rect, 'user_data', None)
+        return cls.from_edges(rect.left, rect.right, rect.bottom, rect.top, user_data)
+
+    @classmethod
+    def from_size(cls: Type[D], width: Number, height: Number, user: Any = None) -> D:
+        """
+        Construct a rect with a given width and height, centered at (0, 0).
+        Both sides must be even, otherwise the edges are not on the grid.
+
+        >>> DbuRect.from_size(4, 6)
+        [-2:2, -3:3]
+        """
+        return cls(0, 0, width, height, user)
+
+    def __class_getitem__(cls, init_tuple: InitTuple) -> 'DbuRect':
+        """
+        Construct a rect using slice notation.
+
+        >>> DbuRect[0:2, 0:4, 'red']
+        [0:2, 0:4] 'red'
+        """
+        x_range, y_range, *optional_user_data = init_tuple
+        user_data = optional_user_data[0] if optional_user_data else None
+        return cls.from_edges(*_to_start_stop(x_range), *_to_start_stop(y_range), user_data)
+
+    def to_rect(self) -> Rect:
+        """
+        Convert to a regular rect
+
+        >>> DbuRect[0:2, 0:4].to_rect()
+        [0:2, 0:4]
+        """
+        return Rect.from_edges(self._left, self._right, self._bottom, self._top, self.user_data)
+
+    def _set_edges(self, left: Number, right: Number, bottom: Number, top: Number) -> None:
+        # every change of the edges goes through here to notify the groups
+        if self._parents or self._borrowers:
+            self._will_change()
+        self._left, self._right = _to_dbu(left), _to_dbu(right)
+        self._bottom, self._top = _to_dbu(bottom), _to_dbu(top)
+        if self._parents:
+            self._changed()
+
+    def _move(self, dx: Number, dy: Number) -> None:
+        dx, dy = _to_dbu(dx), _to_dbu(dy)
+        self._set_edges(self._left + dx, self._right + dx, self._bottom + dy, self._top + dy)
+
+    def _apply(self, transform: Transform) -> None:
+        x, y, width, height = transform.rect(self.x, self.y, self.width, self.height)
+        self._set_edges(x - width / 2, x + width / 2, y - height / 2, y + height / 2)
+
+    # Edges
+
+    @property
+    def left(self) -> int:
+        return self._left
+
+    @left.setter
+    def left(self, value: Number) -> None:
+        self._move(_to_dbu(value) - self._left, 0)
+
+    @property
+    def right(self) -> int:
+        return self._right
+
+    @right.setter
+    def right(self, value: Number) -> None:
+        self._move(_to_dbu(value) - self._right, 0)
+
+    @property
+    def bottom(self) -> int:
+        return self._bottom
+
+    @bottom.setter
+    def bottom(self, value: Number) -> None:
+        self._move(0, _to_dbu(value) - self._bottom)
+
+    @property
+    def top(self) -> int:
+        return self._top
+
+    @top.setter
+    def top(self, value: Number) -> None:
+        self._move(0, _to_dbu(value) - self._top)
+
+    # Center and size
+
+    @property
+    def x(self) -> Number:
+        return _half(self._left + self._right)
+
+    @x.setter
+    def x(self, value: Number) -> None:
+        self._move(value - self.x, 0)
+
+    @property
+    def y(self) -> Number:
+        return _half(self._bottom + self._top)
+
+    @y.setter
+    def y(self, value: Number) -> None:
+        self._move(0, value - self.y)
+
+    @property
+    def width(self) -> int:
+        return self._right - self._left
+
+    @width.setter
+    def width(self, value: Number) -> None:
+        change = _to_dbu(value) - self.width
+        if change % 2:
+            raise ValueError(
+                f"changing the width by {change} would move the edges off the database unit grid"
+            )
+        half = change // 2
+        self._set_edges(self._left - half, self._right + half, self._bottom, self._top)
+
+    @property
+    def height(self) -> int:
+        return self._top - self._bottom
+
+    @height.setter
+    def height(self, value: Number) -> None:
+        change = _to_dbu(value) - self.height
+        if change % 2:
+            raise ValueError(
+                f"changing the height by {change} would move the edges off the database unit grid"
+            )
+        half = change // 2
+        self._set_edges(self._left, self._right, self._bottom - half, self._top + half)
+
+    # Stretching
+
+    def _stretch_left(self, offset: Number) -> None:
+        self._set_edges(self._left + offset, self._right, self._bottom, self._top)
+
+    def _stretch_right(self, offset: Number) -> None:
+        self._set_edges(self._left, self._right + offset, self._bottom, self._top)
+
+    def _stretch_bottom(self, offset: Number) -> None:
+        self._set_edges(self._left, self._right, self._bottom + offset, self._top)
+
+    def _stretch_top(self, offset: Number) -> None:
+        self._set_edges(self._left, self._right, self._bottom, self._top + offset)
+
+    # Topology
+
+    def intersection(self, rect: Union[Rect, 'DbuRect']) -> Optional['DbuRect']:
+        """
+        Like :meth:`Rect.intersection`, but the result is a :class:`DbuRect`
+
+        >>> DbuRect[0:2, 0:4].intersection(DbuRect[1:3, 2:6])
+        [1:2, 2:4]
+        """
+        left = max(self._left, rect.left)
+        right = min(self._right, rect.right)
+        bottom = max(self._bottom, rect.bottom)
+        top = min(self._top, rect.top)
+
+        if left >= right or bottom >= top:
+            return None
+
+        return DbuRect.from_edges(left, right, bottom, top)
+
+    def union(self, rect: Union[Rect, 'DbuRect']) -> 'DbuRect':
+        """
+        Like :meth:`Rect.union`, but the result is a :class:`DbuRect`
+
+        >>> DbuRect[0:1, 0:1].union(DbuRect[2:3, 2:3])
+        [0:3, 0:3]
+        """
+        left = min(self._left, rect.left)
+        right = max(self._right, rect.right)
+        bottom = min(self._bottom, rect.bottom)
+        top = max(self._top, rect.top)
+        return DbuRect.from_edges(left, right, bottom, top)
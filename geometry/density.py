@@ -0,0 +1,65 @@
+from array import array
+from math import ceil, floor
+from typing import Any, Iterable
+
+from .point import Number
+from .rect import BaseRect
+from .sweep import _edges, _merged_edges
+
+
+def density(
+    shapes: Iterable[Any], window: BaseRect, tile_width: Number, tile_height: Number
+) -> 'array[float]':
+    """
+    Rasterize the shapes onto a grid of tiles and return the covered share of every tile.
+
+    The tiles start at the bottom left corner of the window. The result is a flat array
+    with one row of tiles after the other, from bottom to top, i.e. the tile in
+    ``column`` and ``row`` is at index ``row * columns + column`` where
+    ``columns = ceil(window.width / tile_width)``.
+    Tiles at the right and top border are cut off at the window.
+
+    The shapes are merged with a sweep first, so overlaps are counted once and every
+    tile gets the exact covered area, without sampling.
+
+    >>> from geometry import Rect
+    >>> shapes = [Rect[0:3, 0:1], Rect[0:1, 0:2], Rect[3:4, 3:4]]
+    >>> density(shapes, Rect[0:4, 0:4], 2, 2)
+    array('d', [0.75, 0.25, 0.0, 0.25])
+    """
+    assert tile_width > 0 and tile_height > 0, "tiles must not be empty"
+    window_left, window_right = window.left, window.right
+    window_bottom, window_top = window.bottom, window.top
+    columns = ceil(window.width / tile_width)
+    rows = ceil(window.height / tile_height)
+    covered = array('d', [0.0]) * (columns * rows)
+
+    clipped = [
+        (max(lt, window_left), min(rt, window_right), max(bt, window_bottom), min(tp, window_top))
+        for lt, rt, bt, tp in _edges(shapes)
+    ]
+    clipped = [(lt, rt, bt, tp) for lt, rt, bt, tp in clipped if lt < rt and bt < tp]
+
+    for left, right, bottom, top in _merged_edges(clipped):
+        first_column = floor((left - window_left) / tile_width)
+        last_column = min(ceil((right - window_left) / tile_width), columns)
+        first_row = floor((bottom - window_bottom) / tile_height)
+        last_row = min(ceil((top - window_bottom) / tile_height), rows)
+        for row in range(first_row, last_row):
+            tile_bottom = window_bottom + row * tile_height
+            height = min(top, tile_bottom + tile_height) - max(bottom, tile_bottom)
+            if height <= 0:
+                continue
+            offset = row * columns
+            for column in range(first_column, last_column):
+                tile_left = window_left + column * tile_width
+                width = min(right, tile_left + tile_width) - max(left, tile_left)
+                if width > 0:
+                    covered[offset + column] += width * height
+
+    widths = [min(tile_width, window.width - column * tile_width) for column in range(columns)]
+    heights = [min(tile_height, window.height - row * tile_height) for row in range(rows)]
+    for row, height in enumerate(heights):
+        for column, width in enumerate(widths):
+            covered[row * columns + column] /= width * height
+    return covered
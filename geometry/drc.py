@@ -0,0 +1,494 @@
+from array import array
+from dataclasses import dataclass
+from dataclasses import replace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+from typing import Sequence, Tuple
+
+from .point import Number
+from .rect import Rect
+from .index import SpatialIndex, Box, _box, _merge, _overlaps
+from .sweep import subtract
+from .transform import Transform
+from .view import ShapeView
+
+
+class Violation(NamedTuple):
+    """
+    A place where a rule is violated. The ``marker`` is a rect around the problem,
+    ``shapes`` are the shapes that cause it.
+    """
+
+    rule: 'Rule'
+    marker: Rect
+    shapes: Tuple[Any, ...]
+
+
+class _Layer:
+    """
+    The shapes of one layer in columns, so every rule can run over all of them at once
+    """
+
+    def __init__(self, shapes: List[Any]) -> None:
+        self.shapes = shapes
+        self.boxes = [_box(shape) for shape in shapes]
+        self.left = array('d', (box[0] for box in self.boxes))
+        self.bottom = array('d', (box[1] for box in self.boxes))
+        self.right = array('d', (box[2] for box in self.boxes))
+        self.top = array('d', (box[3] for box in self.boxes))
+        self._index: Optional[SpatialIndex[int]] = None
+
+    @property
+    def index(self) -> SpatialIndex[int]:
+        if self._index is None:
+            entries = [(box, i) for i, box in enumerate(self.boxes)]
+            self._index = SpatialIndex._bulk_load_entries(entries, 16)
+        return self._index
+
+
+Layers = Dict[Any, _Layer]
+
+_ANY_LAYER = object()
+
+
+def _layer(layers: Layers, name: Any) -> _Layer:
+    return layers[name] if name in layers else _Layer([])
+
+
+Context = Callable[[Rect, Any], List[Any]]
+
+
+class Rule:
+    """
+    Base class of all design rules
+    """
+
+    #: how far apart two shapes may be and still violate the rule together,
+    #: ``None`` if the rule only looks at one shape at a time
+    halo: Optional[Number] = None
+
+    @property
+    def reach(self) -> Number:
+        """
+        How far from its shapes the rule looks, shapes that are further away can neither
+        cause nor fix a violation of the rule. This is the :attr:`halo` by default.
+        """
+        return 0 if self.halo is None else self.halo
+
+    def check(self, layers: Layers) -> List[Violation]:
+        raise NotImplementedError()
+
+    def recheck(self, violation: Violation, context: Context) -> Optional[Violation]:
+        """
+        Check a violation that was found inside of a cell again, now that the shapes
+        around the cell are known. ``context(window, layer)`` returns the shapes of a layer
+        in a window. Returns ``None`` if the surroundings fix the violation.
+        """
+        return violation
+
+
+@dataclass(frozen=True)
+class MinWidth(Rule):
+    """
+    Every shape of the layer must be at least ``minimum`` wide and high,
+    i.e. its :attr:`~Rect.short_side` must not be shorter.
+    """
+
+    layer: Any
+    minimum: Number
+
+    def check(self, layers: Layers) -> List[Violation]:
+        shapes = _layer(layers, self.layer)
+        widths = [right - left for left, right in zip(shapes.left, shapes.right)]
+        heights = [top - bottom for bottom, top in zip(shapes.bottom, shapes.top)]
+        minimum = self.minimum
+        return [
+            Violation(self, Rect.from_edges(*_edges(shapes.boxes[i])), (shapes.shapes[i],))
+            for i, (width, height) in enumerate(zip(widths, heights))
+            if width < minimum or height < minimum
+        ]
+
+
+@dataclass(frozen=True)
+class MinSpacing(Rule):
+    """
+    Shapes of the layer that do not touch must be at least ``minimum`` apart.
+    The distance between corners is measured diagonally.
+    """
+
+    layer: Any
+    minimum: Number
+
+    @property
+    def halo(self) -> Number:  # type: ignore
+        return self.minimum
+
+    def check(self, layers: Layers) -> List[Violation]:
+        shapes = _layer(layers, self.layer)
+        minimum = self.minimum
+
+        pairs: List[Tuple[int, int]] = []
+        for i, (left, bottom, right, top) in enumerate(shapes.boxes):
+            window = [left - minimum, bottom - minimum, right + minimum, top + minimum]
+            pairs.extend((i, j) for j in shapes.index._query_box(window, _overlaps) if j > i)
+
+        lefts, rights, bottoms, tops = shapes.left, shapes.right, shapes.bottom, shapes.top
+        # the gaps are negative where the shapes overlap along an axis
+        gap_x = [max(lefts[i], lefts[j]) - min(rights[i], rights[j]) for i, j in pairs]
+        gap_y = [max(bottoms[i], bottoms[j]) - min(tops[i], tops[j]) for i, j in pairs]
+        distances = [
+            max(x, 0) * max(x, 0) + max(y, 0) * max(y, 0) if x >= 0 or y >= 0 else -1
+            for x, y in zip(gap_x, gap_y)
+        ]
+
+        violations = []
+        for (i, j), distance in zip(pairs, distances):
+            if 0 < distance < minimum * minimum:
+                # the two middle coordinates bound the gap, or the overlap along an axis
+                xs = sorted((lefts[i], rights[i], lefts[j], rights[j]))
+                ys = sorted((bottoms[i], tops[i], bottoms[j], tops[j]))
+                marker = Rect.from_edges(xs[1], xs[2], ys[1], ys[2])
+                violations.append(Violation(self, marker, (shapes.shapes[i], shapes.shapes[j])))
+        return violations
+
+
+@dataclass(frozen=True)
+class Enclosure(Rule):
+    """
+    Every shape of the ``inner`` layer must be covered by the ``outer`` layer,
+    with at least ``margin`` to spare on every side. The outer layer may consist of
+    several shapes.
+    """
+
+    inner: Any
+    outer: Any
+    margin: Number = 0
+
+    @property
+    def reach(self) -> Number:
+        return self.margin
+
+    def check(self, layers: Layers) -> List[Violation]:
+        inner = _layer(layers, self.inner)
+        outer = _layer(layers, self.outer)
+        margin = self.margin
+
+        violations = []
+        for shape, (left, bottom, right, top) in zip(inner.shapes, inner.boxes):
+            grown = Rect.from_edges(left - margin, right + margin, bottom - margin, top + margin)
+            nearby = [outer.shapes[j] for j in outer.index._query_box(_box(grown), _overlaps)]
+            violation = self._violation(shape, grown, nearby)
+            if violation is not None:
+                violations.append(violation)
+        return violations
+
+    def recheck(self, violation: Violation, context: Context) -> Optional[Violation]:
+        shape = violation.shapes[0]
+        margin = self.margin
+        grown = Rect.from_edges(
+            shape.left - margin, shape.right + margin, shape.bottom - margin, shape.top + margin
+        )
+        return self._violation(shape, grown, context(grown, self.outer))
+
+    def _violation(self, shape: Any, grown: Rect, nearby: List[Any]) -> Optional[Violation]:
+        uncovered = subtract([grown], nearby)
+        if not uncovered:
+            return None
+        marker = Rect.from_edges(
+            min(rest.left for rest in uncovered),
+            max(rest.right for rest in uncovered),
+            min(rest.bottom for rest in uncovered),
+            max(rest.top for rest in uncovered),
+        )
+        return Violation(self, marker, (shape, *nearby))
+
+
+def _edges(box: Box) -> Tuple[Number, Number, Number, Number]:
+    return box[0], box[2], box[1], box[3]
+
+
+def check(shapes: Iterable[Any], rules: Sequence[Rule]) -> List[Violation]:
+    """
+    Check the shapes against all rules. The layer of a shape is its ``user_data``.
+
+    The shapes are sorted into layers once and every rule works on whole layers.
+    Neighbours are looked up in a :class:`SpatialIndex`, so shapes that are far apart
+    are never compared.
+
+    >>> shapes = [
+    ...     Rect[0:10, 0:2, 'metal'],
+    ...     Rect[0:10, 3:4, 'metal'],
+    ...     Rect[1:2, 0:1, 'via'],
+    ...     Rect[9:11, 0:1, 'via'],
+    ... ]
+    >>> rules = [MinWidth('metal', 2), MinSpacing('metal', 2), Enclosure('via', 'metal')]
+    >>> for violation in check(shapes, rules):
+    ...     print(violation.rule, violation.marker)
+    MinWidth(layer='metal', minimum=2) [0:10, 3:4]
+    MinSpacing(layer='metal', minimum=2) [0:10, 2:3]
+    Enclosure(inner='via', outer='metal', margin=0) [10:11, 0:1]
+    """
+    by_layer: Dict[Any, List[Any]] = {}
+    for shape in shapes:
+        by_layer.setdefault(getattr(shape, 'user_data', None), []).append(shape)
+    layers = {name: _Layer(layer_shapes) for name, layer_shapes in by_layer.items()}
+    return [violation for rule in rules for violation in rule.check(layers)]
+
+
+CellKey = Tuple[Any, ...]
+
+
+def _is_cell(shape: Any) -> bool:
+    return hasattr(shape, '_placed_children') or hasattr(shape, '_placed_cells')
+
+
+def _content(cell: Any) -> Tuple[CellKey, Transform, List[Tuple[Any, Transform]]]:
+    # the key, the own transform and the children of a group or an array,
+    # copies of a group share their shapes and so they share the key as well
+    if hasattr(cell, '_placed_cells'):
+        columns, rows = cell.columns, cell.rows
+        column_step, row_step = cell.column_step, cell.row_step
+        key = ('array', id(cell.master), columns, rows, column_step, row_step)
+        offsets = (
+            Transform(
+                column * column_step.x + row * row_step.x,
+                column * column_step.y + row * row_step.y,
+            )
+            for row in range(rows)
+            for column in range(columns)
+        )
+        return key, cell.transform, [(cell.master, offset) for offset in offsets]
+    shapes = cell._shapes
+    return ('group', *map(id, shapes)), cell._transform, [(shape, Transform()) for shape in shapes]
+
+
+def _placed_view(view: Any, transform: Transform) -> ShapeView:
+    return replace(ShapeView.of(view, transform), shape=view.shape)
+
+
+def _placed_box(box: Box, transform: Transform) -> Box:
+    left, bottom, right, top = box
+    x, y, width, height = transform.rect(
+        (left + right) / 2, (bottom + top) / 2, right - left, top - bottom
+    )
+    return [x - width / 2, y - height / 2, x + width / 2, y + height / 2]
+
+
+def _placed_violation(violation: Violation, transform: Transform) -> Violation:
+    marker = violation.marker
+    return Violation(
+        violation.rule,
+        Rect(*transform.rect(marker.x, marker.y, marker.width, marker.height)),
+        tuple(_placed_view(shape, transform) for shape in violation.shapes),
+    )
+
+
+def _grown(box: Box, halo: Number) -> Box:
+    return [box[0] - halo, box[1] - halo, box[2] + halo, box[3] + halo]
+
+
+class _Cell:
+    """
+    The leaves and placed instances of a group or array, in its own coordinates
+    """
+
+    def __init__(self, leaves: List[ShapeView], instances: List[Tuple['_Cell', Transform]]):
+        self.leaves = leaves
+        # empty instances can neither violate nor fix anything
+        self.instances = [(cell, rigid) for cell, rigid in instances if cell.bbox is not None]
+        self.boxes = [_box(leaf) for leaf in leaves] + [
+            _placed_box(cell.bbox, rigid) for cell, rigid in self.instances  # type: ignore
+        ]
+        self.bbox: Optional[Box] = _merge(self.boxes) if self.boxes else None
+        # violations in the coordinates of the cell that found them, together with
+        # the transform into this cell, so that each of them is placed only once
+        self.violations: List[Tuple[Transform, List[Violation]]] = []
+        self._index: Optional[SpatialIndex[int]] = None
+
+    @property
+    def index(self) -> SpatialIndex[int]:
+        # the entries after the leaves are the instances
+        if self._index is None:
+            entries = [(box, i) for i, box in enumerate(self.boxes)]
+            self._index = SpatialIndex._bulk_load_entries(entries, 16)
+        return self._index
+
+    def query(self, box: Box, layer: Any = _ANY_LAYER) -> List[ShapeView]:
+        """
+        The leaves of this cell and all instances that overlap the box
+        """
+        return [view for _, view in self._query(box, layer)]
+
+    def _query(self, box: Box, layer: Any) -> Iterator[Tuple[Tuple[int, ...], ShapeView]]:
+        # every leaf comes with its path of entries, which tells apart the same shape
+        # in two instances at the same place
+        leaves = self.leaves
+        for entry in self.index._query_box(box, _overlaps):
+            if entry < len(leaves):
+                leaf = leaves[entry]
+                if layer is _ANY_LAYER or leaf.user_data == layer:
+                    yield (entry,), leaf
+            else:
+                cell, rigid = self.instances[entry - len(leaves)]
+                local = _placed_box(box, rigid.inverse())
+                for path, view in cell._query(local, layer):
+                    yield (entry, *path), _placed_view(view, rigid)
+
+
+class _HierarchicalCheck:
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules = rules
+        self.pair_rules = [rule for rule in rules if rule.halo is not None]
+        self.halo: Number = max((rule.halo for rule in self.pair_rules), default=0)  # type: ignore
+        self.reach: Number = max((rule.reach for rule in rules), default=0)
+        self.cells: Dict[Tuple[CellKey, Number], _Cell] = {}
+
+    def run(self, top: Any) -> List[Violation]:
+        _, own, _ = _content(top)
+        cell = self.cell(top, own.magnification)
+        rigid = own._replace(magnification=1)
+        return [
+            _placed_violation(violation, transform.then(rigid))
+            for transform, violations in cell.violations
+            for violation in violations
+        ]
+
+    def cell(self, group: Any, magnification: Number) -> _Cell:
+        # a cell is checked once per magnification, every placement of it only
+        # differs by the rotation, mirroring and offset
+        key, _, children = _content(group)
+        if (key, magnification) in self.cells:
+            return self.cells[key, magnification]
+
+        frame = Transform(magnification=magnification)
+        leaves = []
+        instances = []
+        for child, offset in children:
+            placement = offset.then(frame)
+            if _is_cell(child):
+                _, own, _ = _content(child)
+                placement = own.then(placement)
+                child_cell = self.cell(child, placement.magnification)
+                instances.append((child_cell, placement._replace(magnification=1)))
+            else:
+                leaves.append(ShapeView.of(child, placement))
+
+        cell = _Cell(leaves, instances)
+        cell.violations = self._violations(cell)
+        self.cells[key, magnification] = cell
+        return cell
+
+    def _violations(self, cell: _Cell) -> List[Tuple[Transform, List[Violation]]]:
+        index = cell.index
+        first = len(cell.leaves)
+
+        def context(window: Rect, layer: Any) -> List[Any]:
+            return cell.query(_box(window), layer)
+
+        def recheck(violation: Violation, source: int, transform: Transform) -> bool:
+            # only shapes from outside of the source within the reach of the marker can fix it
+            rule = violation.rule
+            if type(rule).recheck is Rule.recheck:
+                return False
+            box = _grown(_placed_box(_box(violation.marker), transform), rule.reach)
+            return any(
+                other >= first if source < 0 else other != source
+                for other in index._query_box(box, _overlaps)
+            )
+
+        own = []
+        for violation in check(cell.leaves, self.rules):
+            if recheck(violation, -1, Transform()):
+                violation = violation.rule.recheck(violation, context)  # type: ignore
+                if violation is None:
+                    continue
+            own.append(violation)
+        if self.pair_rules and cell.instances:
+            own.extend(self._interactions(cell))
+        chunks = [(Transform(), own)]
+
+        for entry, (child, rigid) in enumerate(cell.instances, first):
+            # the shapes around an instance can change its violations within the reach
+            neighbours = index._query_box(_grown(cell.boxes[entry], self.reach), _overlaps)
+            isolated = all(other == entry for other in neighbours)
+            for transform, violations in child.violations:
+                placement = transform.then(rigid)
+                if isolated:
+                    chunks.append((placement, violations))
+                    continue
+                kept = []
+                for violation in violations:
+                    if recheck(violation, entry, placement):
+                        changed = violation.rule.recheck(
+                            _placed_violation(violation, placement), context
+                        )
+                        if changed is not None:
+                            own.append(changed)
+                    else:
+                        kept.append(violation)
+                chunks.append((placement, kept))
+        return [(transform, violations) for transform, violations in chunks if violations]
+
+    def _interactions(self, cell: _Cell) -> List[Violation]:
+        # the shapes of an instance that are within the halo of a neighbour are checked
+        # together with the neighbour, only pairs from different sources are new
+        halo = self.halo
+        first = len(cell.leaves)
+        # leaves are keyed by their entry, the shapes of instances by their whole path
+        candidates: Dict[Tuple[int, ...], ShapeView] = {}
+        sources: Dict[int, int] = {}
+
+        for entry, (child, rigid) in enumerate(cell.instances, first):
+            inverse = rigid.inverse()
+            for other in cell.index._query_box(_grown(cell.boxes[entry], halo), _overlaps):
+                if other == entry:
+                    continue
+                local = _placed_box(_grown(cell.boxes[other], halo), inverse)
+                for path, view in child._query(local, _ANY_LAYER):
+                    path = (entry, *path)
+                    if path not in candidates:
+                        placed = candidates[path] = _placed_view(view, rigid)
+                        sources[id(placed)] = entry
+                if other < first:
+                    leaf = candidates[other,] = cell.leaves[other]
+                    sources[id(leaf)] = -1
+
+        return [
+            violation
+            for violation in check(candidates.values(), self.pair_rules)
+            if len({sources[id(shape)] for shape in violation.shapes}) > 1
+        ]
+
+
+def check_hierarchy(top: Any, rules: Sequence[Rule]) -> List[Violation]:
+    """
+    Like :func:`check`, but for the rects and segments of a group or array and all
+    nested groups and arrays. A group or array that is placed many times is checked only
+    once, its violations are moved to every place where it is used. Only the shapes
+    where instances come close to each other are checked again, and violations inside of
+    an instance that are fixed by the shapes around it are dropped, e.g. a via whose
+    metal is placed by the parent.
+
+    Copies of a group (see :meth:`Group.copy`) count as the same group, as long as
+    neither of them is changed.
+
+    >>> from geometry import Group, GroupArray, Point
+    >>> cell = Group([Rect[0:5, 0:4, 'metal'], Rect[4:6, 1:2, 'via']])
+    >>> row = GroupArray(cell, 100, 1, Point(5, 0), Point(0, 5))
+    >>> [violation.marker for violation in check_hierarchy(row, [Enclosure('via', 'metal')])]
+    [[500:501, 1:2]]
+
+    >>> grid = GroupArray(cell, 10, 10, Point(6, 0), Point(0, 6))
+    >>> len(check_hierarchy(grid, [MinSpacing('metal', 2)]))
+    90
+
+    Shapes around an instance count as far as the rules reach, even if they do not
+    touch the instance, like this ring of metal that encloses the via with a margin
+
+    >>> via = Group([Rect[0:2, 0:2, 'via'], Rect[0:2, 0:2, 'metal']])
+    >>> ring = [Rect[-1:0, -1:3], Rect[2:3, -1:3], Rect[0:2, -1:0], Rect[0:2, 2:3]]
+    >>> top = Group([via, *(rect.copy('metal') for rect in ring)])
+    >>> rules = [Enclosure('via', 'metal', 1)]
+    >>> check_hierarchy(top, rules) == check(top.views(), rules) == []
+    True
+    """
+    return _HierarchicalCheck(rules).run(top)
@@ -0,0 +1,556 @@
+import struct
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Mapping, Optional, Set, Tuple, Union
+
+from .point import Number, Point
+from .rect import Rect
+from .path import Segment
+from .group import Group, GroupArray, Shape
+from .transform import Transform
+from .dbu import _to_dbu
+from .translate import int_if_possible as _int
+
+# GDSII layer and datatype
+Layer = Tuple[int, int]
+
+# record types, including the type of their data
+HEADER = 0x0002
+BGNLIB = 0x0102
+LIBNAME = 0x0206
+UNITS = 0x0305
+ENDLIB = 0x0400
+BGNSTR = 0x0502
+STRNAME = 0x0606
+ENDSTR = 0x0700
+BOUNDARY = 0x0800
+PATH = 0x0900
+SREF = 0x0A00
+AREF = 0x0B00
+TEXT = 0x0C00
+LAYER = 0x0D02
+DATATYPE = 0x0E02
+WIDTH = 0x0F03
+XY = 0x1003
+ENDEL = 0x1100
+SNAME = 0x1206
+COLROW = 0x1302
+NODE = 0x1500
+STRANS = 0x1A01
+MAG = 0x1B05
+ANGLE = 0x1C05
+PATHTYPE = 0x2102
+BOX = 0x2D00
+BOXTYPE = 0x2E02
+BGNEXTN = 0x3003
+ENDEXTN = 0x3103
+
+_ELEMENTS = frozenset((BOUNDARY, PATH, SREF, AREF, TEXT, NODE, BOX))
+_MIRROR = 0x8000
+_MANTISSA = 1 << 56
+_BOUNDARY_XY = struct.Struct('>10i')
+
+
+def _record(kind: int, payload: bytes = b'') -> bytes:
+    return struct.pack('>HH', 4 + len(payload), kind) + payload
+
+
+def _ascii(text: str) -> bytes:
+    data = text.encode('ascii')
+    return data + b'\0' if len(data) % 2 else data
+
+
+def _real(value: float) -> bytes:
+    # 8 byte excess-64 base 16 floating point number
+    if value == 0:
+        return bytes(8)
+    sign = 0x80 if value < 0 else 0
+    value = abs(value)
+    exponent = 64
+    while value >= 1:
+        value /= 16
+        exponent += 1
+    while value < 1 / 16:
+        value *= 16
+        exponent -= 1
+    mantissa = round(value * _MANTISSA)
+    if mantissa == _MANTISSA:
+        mantissa >>= 4
+        exponent += 1
+    return struct.pack('>Q', (sign | exponent) << 56 | mantissa)
+
+
+def _from_real(data: bytes) -> float:
+    bits = int.from_bytes(data[:8], 'big')
+    value = (bits & (_MANTISSA - 1)) / _MANTISSA * 16.0 ** ((bits >> 56 & 0x7F) - 64)
+    return -value if bits >> 63 else value
+
+
+def _date(time: Optional[datetime] = None) -> bytes:
+    time = time or datetime.now()
+    stamp = (time.year, time.month, time.day, time.hour, time.minute, time.second)
+    return struct.pack('>12h', *stamp, *stamp)
+
+
+def _default_layer(user_data: Any) -> Layer:
+    if isinstance(user_data, int):
+        return user_data, 0
+    if isinstance(user_data, tuple) and len(user_data) == 2:
+        if all(isinstance(number, int) for number in user_data):
+            return user_data
+    raise ValueError(f"{user_data!r} is not a GDS layer, pass a mapping to layers numbers")
+
+
+def _points(*points: Point) -> bytes:
+    coordinates = [_to_dbu(value) for point in points for value in point]
+    return _record(XY, struct.pack(f'>{len(coordinates)}i', *coordinates))
+
+
+def _placement(transform: Transform) -> bytes:
+    if transform.is_translation:
+        return b''
+    strans = _record(STRANS, struct.pack('>H', _MIRROR if transform.mirror else 0))
+    if transform.magnification != 1:
+        strans += _record(MAG, _real(transform.magnification))
+    if transform.rotation:
+        strans += _record(ANGLE, _real(transform.rotation))
+    return strans
+
+
+class _Writer:
+    def __init__(
+        self,
+        file: BinaryIO,
+        name: str,
+        layers: Optional[Mapping[Any, Union[int, Layer]]],
+        date: bytes,
+    ) -> None:
+        self.file = file
+        self.name = name
+        self.layers = layers or {}
+        self.date = date
+        self.names: Dict[Tuple[int, ...], str] = {}
+        self.boundaries: Dict[Any, bytes] = {}
+        self.chunks: List[bytes] = []
+
+    def flush(self) -> None:
+        self.file.write(b''.join(self.chunks))
+        self.chunks.clear()
+
+    def write(self, data: bytes) -> None:
+        self.chunks.append(data)
+        if len(self.chunks) >= 4096:
+            self.flush()
+
+    def layer(self, user_data: Any) -> Layer:
+        layer = self.layers.get(user_data, user_data)
+        return (layer, 0) if isinstance(layer, int) else _default_layer(layer)
+
+    def boundary(self, user_data: Any) -> bytes:
+        # everything of a rect except for the coordinates only depends on the layer
+        try:
+            return self.boundaries[user_data]
+        except KeyError:
+            pass
+        except TypeError:
+            return self._boundary(user_data)
+        prefix = self.boundaries[user_data] = self._boundary(user_data)
+        return prefix
+
+    def _boundary(self, user_data: Any) -> bytes:
+        layer, datatype = self.layer(user_data)
+        return (
+            _record(BOUNDARY)
+            + _record(LAYER, struct.pack('>h', layer))
+            + _record(DATATYPE, struct.pack('>h', datatype))
+            + struct.pack('>HH', 4 + _BOUNDARY_XY.size, XY)
+        )
+
+    def structure(self, group: Group, name: Optional[str] = None) -> str:
+        # every structure is written before the structures that use it,
+        # copies of a group share their shapes and so they share the structure
+        key = tuple(map(id, group._shapes))
+        if name is None and key in self.names:
+            return self.names[key]
+        for shape in group._shapes:
+            if isinstance(shape, GroupArray):
+                self.structure(shape.master)
+            elif isinstance(shape, Group):
+                self.structure(shape)
+        if name is None:
+            name = self.names[key] = f'{self.name}_{len(self.names)}'
+            frame = Transform()
+        else:
+            frame = group._transform
+
+        self.write(_record(BGNSTR, self.date) + _record(STRNAME, _ascii(name)))
+        for shape in group._shapes:
+            self.element(shape, frame)
+        self.write(_record(ENDSTR))
+        self.flush()
+        return name
+
+    def element(self, shape: Shape, frame: Transform) -> None:
+        if isinstance(shape, GroupArray):
+            self.array(shape, frame)
+        elif isinstance(shape, Group):
+            transform = shape._transform.then(frame)
+            name = self.structure(shape)
+            self.write(
+                _record(SREF)
+                + _record(SNAME, _ascii(name))
+                + _placement(transform)
+                + _points(Point(transform.dx, transform.dy))
+                + _record(ENDEL)
+            )
+        elif frame.is_identity and getattr(shape, 'direction', None) is None:
+            self.rect(shape.x, shape.y, shape.width, shape.height, shape.user_data)
+        else:
+            x, y, width, height = frame.rect(shape.x, shape.y, shape.width, shape.height)
+            direction = getattr(shape, 'direction', None)
+            if direction is None:
+                self.rect(x, y, width, height, shape.user_data)
+                return
+            vector = frame.vector(direction * 1)
+            self.segment(x, y, width, height, vector, shape.user_data)
+
+    def rect(self, x: Number, y: Number, width: Number, height: Number, user_data: Any) -> None:
+        left = _to_dbu(x - width / 2)
+        right = _to_dbu(x + width / 2)
+        bottom = _to_dbu(y - height / 2)
+        top = _to_dbu(y + height / 2)
+        self.write(
+            self.boundary(user_data)
+            + _BOUNDARY_XY.pack(left, bottom, right, bottom, right, top, left, top, left, bottom)
+            + _record(ENDEL)
+        )
+
+    def segment(
+        self, x: Number, y: Number, width: Number, height: Number, vector: Point, user_data: Any
+    ) -> None:
+        # segments with a center line on the grid become paths, the others rects
+        horizontal = vector.y == 0
+        length, thickness = (width, height) if horizontal else (height, width)
+        half = vector * (length / 2)
+        start, end = Point(x - half.x, y - half.y), Point(x + half.x, y + half.y)
+        if not all(float(value).is_integer() for value in (*start, *end, thickness)):
+            self.rect(x, y, width, height, user_data)
+            return
+        layer, datatype = self.layer(user_data)
+        self.write(
+            _record(PATH)
+            + _record(LAYER, struct.pack('>h', layer))
+            + _record(DATATYPE, struct.pack('>h', datatype))
+            + _record(WIDTH, struct.pack('>i', _to_dbu(thickness)))
+            + _points(start, end)
+            + _record(ENDEL)
+        )
+
+    def array(self, array: GroupArray, frame: Transform) -> None:
+        transform = array.transform.then(frame)
+        cell = array.master._transform.then(transform)
+        origin = Point(cell.dx, cell.dy)
+        columns, rows = array.columns, array.rows
+        name = self.structure(array.master)
+        self.write(
+            _record(AREF)
+            + _record(SNAME, _ascii(name))
+            + _placement(cell)
+            + _record(COLROW, struct.pack('>hh', columns, rows))
+            + _points(
+                origin,
+                origin + transform.vector(array.column_step) * columns,
+                origin + transform.vector(array.row_step) * rows,
+            )
+            + _record(ENDEL)
+        )
+
+
+def write_gds(
+    top: Group,
+    file: BinaryIO,
+    name: str = 'TOP',
+    library: str = 'LIB',
+    unit: float = 1e-9,
+    user_unit: float = 1e-6,
+    layers: Optional[Mapping[Any, Union[int, Layer]]] = None,
+    time: Optional[datetime] = None,
+) -> None:
+    """
+    Write a group hierarchy as a GDSII stream to a binary file.
+
+    The coordinates are database units of ``unit`` meters each and must be integers.
+    The top group becomes the structure ``name``, nested groups become structures
+    of their own, which are placed with an SREF, and arrays (see :meth:`Group.grid`)
+    become AREFs of the structure of their master. Copies of a group share their
+    shapes, so they share one structure as well.
+
+    Rects are written as boundaries, segments as paths with flush ends. Segments
+    whose center line is not on the grid are written as boundaries.
+    The ``user_data`` of a shape is its layer: either a layer number, a tuple of
+    layer and datatype, or a key of ``layers``, which maps it to one of them.
+    The library and every structure are stamped with ``time``, or the current time
+    if it is not given.
+
+    >>> from io import BytesIO
+    >>> from geometry import Rect
+    >>> via = Group([Rect[0:2, 0:2, 'via'], Rect[-1:3, -1:3, 'metal']])
+    >>> top = Group([via.grid(100, 'right', 100, 'up'), Rect[0:400, -5:-1, 'metal']])
+    >>> stream = BytesIO()
+    >>> write_gds(top, stream, layers={'metal': 1, 'via': (2, 5)})
+    >>> len(stream.getvalue())
+    394
+    >>> _ = stream.seek(0)
+    >>> read_gds(stream, layers={1: 'metal', (2, 5): 'via'})['TOP']
+    {{[0:2, 0:2] 'via', [-1:3, -1:3] 'metal'} 100x100 [-1:399, -1:399], [0:400, -5:-1] 'metal'} ...
+
+    A fixed time makes the output reproducible
+
+    >>> from datetime import datetime
+    >>> streams = BytesIO(), BytesIO()
+    >>> for stream in streams:
+    ...     write_gds(top, stream, layers={'metal': 1, 'via': (2, 5)}, time=datetime(2020, 1, 1))
+    >>> streams[0].getvalue() == streams[1].getvalue()
+    True
+    """
+    date = _date(time)
+    file.write(
+        _record(HEADER, struct.pack('>h', 600))
+        + _record(BGNLIB, date)
+        + _record(LIBNAME, _ascii(library))
+        + _record(UNITS, _real(unit / user_unit) + _real(unit))
+    )
+    writer = _Writer(file, name, layers, date)
+    writer.structure(top, name)
+    file.write(_record(ENDLIB))
+
+
+def _records(file: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    read = file.read
+    while True:
+        header = read(4)
+        if len(header) < 4:
+            return
+        length, kind = struct.unpack('>HH', header)
+        if length < 4:
+            # padding after the end of the library
+            return
+        yield kind, read(length - 4)
+
+
+def _references(file: BinaryIO) -> Set[str]:
+    # the names of all referenced structures, only their data is read
+    start = file.tell()
+    names: Set[str] = set()
+    read, seek = file.read, file.seek
+    while True:
+        header = read(4)
+        if len(header) < 4:
+            break
+        length, kind = struct.unpack('>HH', header)
+        if length < 4 or kind == ENDLIB:
+            break
+        if kind == SNAME:
+            names.add(_string(read(length - 4)))
+        else:
+            seek(length - 4, 1)
+    file.seek(start)
+    return names
+
+
+def _integers(data: bytes) -> Tuple[int, ...]:
+    return struct.unpack(f'>{len(data) // 4}i', data)
+
+
+def _string(data: bytes) -> str:
+    return data.rstrip(b'\0').decode('ascii')
+
+
+class GdsReader:
+    """
+    Read the shapes of a GDSII stream, one element at a time.
+
+    Iterating over the reader yields the name of the structure and the shape of every
+    element, while the file is read. Boundaries and boxes become rects, paths become
+    segments or groups of segments. SREFs become copies of the group of their
+    structure and AREFs become :class:`GroupArray`. Text and nodes are skipped.
+    The coordinates are in database units.
+
+    The shapes of a structure are only kept in :attr:`structures` if later
+    references can use them. A seekable file is scanned for the names of the
+    referenced structures first, the shapes of other structures are dropped once
+    they are yielded. All structures are kept with ``keep=True`` or if the file
+    cannot seek. A structure that is used before it is defined is placed as an array
+    with a single cell, whose master group gets the shapes once they are read.
+    The ``user_data`` of a shape is the layer number, or a tuple of layer and
+    datatype if the datatype is not zero, unless ``layers`` maps that to something
+    else, like the ``layers`` of :func:`write_gds` the other way round.
+
+    >>> from io import BytesIO
+    >>> from geometry import Point
+    >>> wire = Segment.from_start_end(Point(0, 0), Point(0, 8), 2, 1)
+    >>> cell = Group([Rect[-2:2, 0:2, (2, 1)], wire])
+    >>> placed = cell.copy()
+    >>> placed.rotate(90)
+    >>> stream = BytesIO()
+    >>> write_gds(Group([placed, Rect[10:12, 0:2, 3]]), stream)
+    >>> _ = stream.seek(0)
+    >>> reader = GdsReader(stream)
+    >>> for structure, shape in reader:
+    ...     print(structure, shape)
+    TOP_0 [-2:2, 0:2] (2, 1)
+    TOP_0 [-1:1, 0:8] (up) 1
+    TOP {[2:4, 2:6] (2, 1), [-4:4, 3:5] (left) 1} [-4:4, 2:6]
+    TOP [10:12, 0:2] 3
+
+    Only the referenced structure is kept
+
+    >>> list(reader.structures)
+    ['TOP_0']
+    """
+
+    structures: Dict[str, Group]
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        layers: Optional[Mapping[Union[int, Layer], Any]] = None,
+        keep: bool = False,
+    ) -> None:
+        self.file = file
+        self.layers = layers or {}
+        self.keep = keep
+        self.structures = {}
+        # structures that are used, but not defined yet
+        self._pending: Set[str] = set()
+
+    def __iter__(self) -> Iterator[Tuple[str, Shape]]:
+        referenced = None if self.keep or not self.file.seekable() else _references(self.file)
+        name = ''
+        shapes: List[Shape] = []
+        collect = True
+        element: Optional[int] = None
+        fields: Dict[int, bytes] = {}
+        for kind, data in _records(self.file):
+            if kind == ENDEL:
+                shape = self._element(element, fields, name)
+                element = None
+                if shape is not None:
+                    if collect:
+                        shapes.append(shape)
+                    yield name, shape
+            elif element is not None:
+                fields[kind] = data
+            elif kind in _ELEMENTS:
+                element, fields = kind, {}
+            elif kind == STRNAME:
+                name, shapes = _string(data), []
+                collect = referenced is None or name in referenced
+            elif kind == ENDSTR and collect:
+                if name in self._pending:
+                    self._pending.discard(name)
+                    self.structures[name].extend(shapes)
+                else:
+                    self.structures[name] = Group(shapes)
+            elif kind == ENDLIB:
+                return
+
+    def _user_data(self, fields: Dict[int, bytes], datatype: int) -> Any:
+        layer = struct.unpack('>h', fields[LAYER])[0]
+        number = struct.unpack('>h', fields[datatype])[0] if datatype in fields else 0
+        key = layer if number == 0 else (layer, number)
+        return self.layers.get(key, key)
+
+    def _element(self, element: Optional[int], fields: Dict[int, bytes], name: str) -> Any:
+        if element in (BOUNDARY, BOX):
+            xy = _integers(fields[XY])
+            user_data = self._user_data(fields, DATATYPE if element == BOUNDARY else BOXTYPE)
+            return _rect(xy, user_data, name)
+        if element == PATH:
+            return self._path(fields)
+        if element in (SREF, AREF):
+            return self._reference(element, fields)
+        return None
+
+    def _path(self, fields: Dict[int, bytes]) -> Union[Segment, Group]:
+        xy = _integers(fields[XY])
+        points = [Point(x, y) for x, y in zip(xy[::2], xy[1::2])]
+        width = abs(struct.unpack('>i', fields[WIDTH])[0]) if WIDTH in fields else 0
+        kind = struct.unpack('>h', fields[PATHTYPE])[0] if PATHTYPE in fields else 0
+        if kind == 1:
+            raise ValueError("paths with round ends are not supported")
+        if kind in (2, 4):
+            begin = width / 2 if kind == 2 else _integers(fields.get(BGNEXTN, bytes(4)))[0]
+            end = width / 2 if kind == 2 else _integers(fields.get(ENDEXTN, bytes(4)))[0]
+            points[0] = _extended(points[0], points[1], begin)
+            points[-1] = _extended(points[-1], points[-2], end)
+
+        user_data = self._user_data(fields, DATATYPE)
+        if len(points) == 2:
+            return Segment.from_start_end(points[0], points[1], width, user_data)
+        return Group.path_from_points(width, *points, user_data=user_data)
+
+    def _reference(self, element: int, fields: Dict[int, bytes]) -> Union[Group, GroupArray]:
+        flags = struct.unpack('>H', fields[STRANS])[0] if STRANS in fields else 0
+        magnification = _int(_from_real(fields[MAG])) if MAG in fields else 1
+        angle = _from_real(fields[ANGLE]) if ANGLE in fields else 0
+        if angle % 90:
+            raise ValueError(f"only multiples of 90 degrees are supported, not {angle}")
+        xy = _integers(fields[XY])
+        transform = Transform(xy[0], xy[1], int(angle) % 360, bool(flags & _MIRROR), magnification)
+
+        name = _string(fields[SNAME])
+        master = self.structures.get(name)
+        if master is None:
+            master = self.structures[name] = Group()
+            self._pending.add(name)
+        if element == SREF:
+            if name in self._pending:
+                # filled in later, a single cell shows the master without moving it
+                return GroupArray(master, 1, 1, Point(0, 0), Point(0, 0), transform)
+            placed = master.copy()
+            placed._place(transform)
+            return placed
+
+        columns, rows = struct.unpack('>hh', fields[COLROW])
+        inverse = transform._replace(dx=0, dy=0).inverse()
+        column_step = inverse.vector(Point(xy[2] - xy[0], xy[3] - xy[1]) / columns)
+        row_step = inverse.vector(Point(xy[4] - xy[0], xy[5] - xy[1]) / rows)
+        return GroupArray(
+            master,
+            columns,
+            rows,
+            Point(_int(column_step.x), _int(column_step.y)),
+            Point(_int(row_step.x), _int(row_step.y)),
+            transform,
+        )
+
+
+def _extended(point: Point, neighbour: Point, extension: Number) -> Point:
+    if extension == 0 or point == neighbour:
+        return point
+    return point + (point - neighbour).normalized * extension
+
+
+def _rect(xy: Tuple[int, ...], user_data: Any, structure: str) -> Rect:
+    xs, ys = xy[0:10:2], xy[1:10:2]
+    corners = len(xy) // 2
+    is_rect = corners in (4, 5) and len(set(xs)) == 2 and len(set(ys)) == 2
+    if is_rect:
+        # consecutive corners share one coordinate
+        is_rect = all(xs[i] == xs[i + 1] or ys[i] == ys[i + 1] for i in range(len(xs) - 1))
+    if not is_rect:
+        raise ValueError(f"structure {structure} has a polygon, only rects are supported")
+    return Rect.from_edges(min(xs), max(xs), min(ys), max(ys), user_data)
+
+
+def read_gds(
+    file: BinaryIO, layers: Optional[Mapping[Union[int, Layer], Any]] = None
+) -> Dict[str, Group]:
+    """
+    Read all structures of a GDSII stream, see :class:`GdsReader`.
+    The structures are returned by name, in the order of the file.
+    """
+    reader = GdsReader(file, layers, keep=True)
+    for _ in reader:
+        pass
+    return reader.structures
@@ -1,5 +1,9 @@
-from typing import List, Generator, Iterable, Tuple, TypeVar, Any, Union, Optional, Callable
+from typing import List, Generator, Iterable, Tuple, TypeVar, Any, Union, Optional, Callable, Dict
+from typing import overload, Iterator, Sequence, cast
+from array import array
+from heapq import heapify, heappush, heappop
 from dataclasses import dataclass, field
+from sys import getrefcount
 from warnings import warn, simplefilter
 
 from geometry.mixins import AppendMany
@@ -8,10 +12,18 @@ from .rect import Rect
 from .translate import CanTranslate
 from .path import Segment
 from .userdata import HasUserData
+from .observe import Observable, Observer, _shift
+from .transform import Transform
+from .index import SpatialIndex, Box, _box
+from .sweep import overlapping_pairs, merge, boolean, subtract, area
+from .density import density
+from .connect import connectivity, Nets
+from .drc import check_hierarchy, Rule, Violation
+from .view import ShapeView
 
 
 T = TypeVar('T')
-Shape = Union[Rect, Segment, 'Group']
+Shape = Union[Rect, Segment, 'Group', 'GroupArray']
 
 
 def _pairwise(it: Iterable[T]) -> Iterable[Tuple[T, T]]:
@@ -55,30 +67,724 @@ def _deprecate(alternative: str) -> _Decorator:  # pragma: no cover
     return decorator
 
 
-_DIRECTION = {'down': 'bottom', 'up': 'top'}
-
-_OPPOSITES = {
-    'left': 'right',
-    'top': 'bottom',
-    'top_left': 'bottom_right',
-    'top_right': 'bottom_left',
+# the step of a grid cell in units of the width and height of the repeated group
+_STEPS = {
+    'left': Point(-1, 0),
+    'right': Point(1, 0),
+    'bottom': Point(0, -1),
+    'down': Point(0, -1),
+    'top': Point(0, 1),
+    'up': Point(0, 1),
+    'top_left': Point(-1, 1),
+    'top_right': Point(1, 1),
+    'bottom_left': Point(-1, -1),
+    'bottom_right': Point(1, -1),
 }
 
-for _start, _end in list(_OPPOSITES.items()):
-    _OPPOSITES[_end] = _start
+
+Edges = Tuple[Number, Number, Number, Number]
+
+# min heaps for the left and bottom edges, max heaps for the right and top edges
+_SIGNS = (1, -1, 1, -1)
+
+
+def _edges(shape: Shape) -> Edges:
+    return shape.left, shape.right, shape.bottom, shape.top
+
+
+def _extent(shape: Shape) -> Optional[Edges]:
+    # Empty nested groups and arrays have no extent. They are left out of the extents
+    # and the index of their parents, until they get shapes again.
+    if isinstance(shape, (BaseGroup, BaseGroupArray)):
+        bbox = shape.bbox
+        return None if bbox is None else _edges(bbox)
+    return _edges(shape)
+
+
+class _Extents:
+    """
+    The edges of all shapes in a group, kept in one heap per side. This allows
+    the bounding box to shrink when shapes are removed or changed, without
+    scanning all shapes. Outdated heap entries are dropped when they reach the top.
+    """
+
+    def __init__(self, shapes: Iterable[Shape]) -> None:
+        self.edges: Dict[int, Edges] = {}
+        self.counts: Dict[int, int] = {}
+        for shape in shapes:
+            key = id(shape)
+            self.counts[key] = self.counts.get(key, 0) + 1
+            edges = _extent(shape)
+            if edges is not None:
+                self.edges[key] = edges
+        self._heapify()
+
+    def _heapify(self) -> None:
+        self.heaps = [
+            [(sign * edges[side], key) for key, edges in self.edges.items()]
+            for side, sign in enumerate(_SIGNS)
+        ]
+        for heap in self.heaps:
+            heapify(heap)
+
+    def _push(self, key: int, edges: Edges) -> None:
+        self.edges[key] = edges
+        if len(self.heaps[0]) > 2 * len(self.edges) + 16:
+            self._heapify()
+            return
+        for heap, sign, edge in zip(self.heaps, _SIGNS, edges):
+            heappush(heap, (sign * edge, key))
+
+    def add(self, shape: Shape) -> None:
+        key = id(shape)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.refresh(shape)
+
+    def refresh(self, shape: Any) -> None:
+        key = id(shape)
+        if key in self.counts:
+            edges = _extent(shape)
+            if edges is None:
+                # outdated heap entries of empty shapes are dropped like any other
+                self.edges.pop(key, None)
+            elif self.edges.get(key) != edges:
+                self._push(key, edges)
+
+    def shift(self, dx: Number, dy: Number) -> None:
+        # adding the same offset to every entry keeps the heaps ordered
+        self.edges = {
+            key: (left + dx, right + dx, bottom + dy, top + dy)
+            for key, (left, right, bottom, top) in self.edges.items()
+        }
+        for heap, sign, offset in zip(self.heaps, _SIGNS, (dx, dx, dy, dy)):
+            heap[:] = [(edge + sign * offset, key) for edge, key in heap]
+
+    def remove(self, shape: Shape) -> int:
+        """
+        Remove one occurrence of the shape and return how many are left
+        """
+        key = id(shape)
+        count = self.counts[key] - 1
+        if count:
+            self.counts[key] = count
+        else:
+            del self.counts[key]
+            self.edges.pop(key, None)
+        return count
+
+    def bbox(self) -> Optional[Rect]:
+        if not self.edges:
+            return None
+
+        result = []
+        for side, (heap, sign) in enumerate(zip(self.heaps, _SIGNS)):
+            while True:
+                edge, key = heap[0]
+                edges = self.edges.get(key)
+                if edges is not None and sign * edges[side] == edge:
+                    break
+                heappop(heap)
+            result.append(sign * edge)
+        return Rect.from_edges(*result)
+
+
+class _Placement(Observer):
+    """
+    The contained shapes of a group, together with the transform that is still pending
+    for them. The shapes are stored in local coordinates, reading :attr:`shapes`
+    applies the pending transform to them.
+
+    A transform may only stay pending while nobody else holds the shapes. Once the
+    shapes are handed in or out, the group is shared, see :meth:`_expose`. The next
+    move of a shared group checks whether the shapes are still held, and applies the
+    transform right away if they are, see :meth:`BaseGroup._exclusive`.
+
+    Shapes can be borrowed from another group, see :meth:`BaseGroup.__copy__`.
+    Borrowed shapes are copied when they are about to change, or when they are
+    handed out through :attr:`shapes`.
+
+    ``shapes`` and ``bbox`` are properties of this base class, because they are
+    also dataclass fields of :class:`BaseGroup`.
+    """
+
+    _shapes: List[Shape]
+    _extents: Optional[_Extents]
+    _transform = Transform()
+    _borrowed: Optional[Dict[int, Shape]] = None
+    _shared = False
+    _applying = False
+
+    @property
+    def shapes(self) -> List[Shape]:
+        self._own_all()
+        self._expose()
+        return self._shapes
+
+    @shapes.setter
+    def shapes(self, shapes: List[Shape]) -> None:
+        self._will_change()
+        self._disown()
+        self._shapes = shapes
+        self._transform = Transform()
+        self._shared = bool(shapes)
+
+    @property
+    def bbox(self) -> Optional[Rect]:
+        local = self._local_bbox()
+        if local is None or self._transform.is_identity:
+            return local
+        return Rect(*self._transform.rect(local.x, local.y, local.width, local.height))
+
+    @bbox.setter
+    def bbox(self, bbox: Optional[Rect]) -> None:
+        if bbox is not None and not self._transform.is_identity:
+            bbox = Rect(*self._transform.inverse().rect(bbox.x, bbox.y, bbox.width, bbox.height))
+        self._bbox = bbox
+        self._dirty = False
+
+    def _materialize(self) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def _expose(self) -> None:
+        # The caller may hold the shapes from now on. Reading a shape does not notify the
+        # group, so the shapes must be in the coordinates of the group while held.
+        self._materialize()
+        self._shared = True
+
+    def _before_change(self, child: Observable) -> None:
+        # The caller may hold a contained shape and change it in the coordinates of the
+        # group, so the shapes are moved to those coordinates first.
+        self._will_change()
+        self._materialize()
+
+    def _replace(self, clones: Dict[int, Shape]) -> None:
+        self._shapes[:] = [clones.get(id(shape), shape) for shape in self._shapes]
+        for clone in clones.values():
+            clone._attach(self)
+        # the extents are keyed by the identity of the shapes
+        self._extents = None
+
+    def _own(self, shape: Any) -> None:
+        if self._borrowed is None or self._borrowed.pop(id(shape), None) is None:
+            return
+        shape._take_back(self)
+        self._replace({id(shape): shape.copy()})
+
+    def _own_all(self) -> None:
+        borrowed, self._borrowed = self._borrowed, None
+        if not borrowed:
+            return
+        for shape in borrowed.values():
+            shape._take_back(self)
+        self._replace({key: shape.copy() for key, shape in borrowed.items()})
+
+    def _disown(self) -> None:
+        borrowed, self._borrowed = self._borrowed, None
+        for shape in (borrowed or {}).values():
+            shape._take_back(self)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # pickled and deep copied groups own their shapes
+        state = super().__getstate__()
+        state.pop('_borrowed', None)
+        return state
+
+
+Leaf = Union[Rect, Segment]
+Placed = Tuple[Shape, Transform]
+
+# default for the layer filter, None is a valid layer
+_ALL_LAYERS = object()
+
+# How often a list element is referenced while it is counted by BaseGroup._exclusive,
+# which depends on the Python version. The element is only held by the list.
+_COUNTED = max(map(getrefcount, [object()]))
+
+
+def _overlaps(shape: Shape, transform: Transform, window: Rect) -> bool:
+    bbox = shape.bbox if isinstance(shape, (BaseGroup, BaseGroupArray)) else shape
+    if bbox is None:
+        return False
+    x, y, width, height = transform.rect(bbox.x, bbox.y, bbox.width, bbox.height)
+    return (
+        abs(x - window.x) * 2 < width + window.width
+        and abs(y - window.y) * 2 < height + window.height
+    )
+
+
+def _walk(
+    placed: Iterable[Placed], layer: Any, window: Optional[Rect]
+) -> Generator[Tuple[Transform, Leaf], None, None]:
+    stack = [iter(placed)]
+    while stack:
+        for shape, transform in stack[-1]:
+            if window is not None and not _overlaps(shape, transform, window):
+                continue
+            if isinstance(shape, BaseGroup):
+                stack.append(shape._placed_children(transform, window))
+                break
+            if isinstance(shape, BaseGroupArray):
+                stack.append(shape._placed_cells(transform))
+                break
+            if layer is _ALL_LAYERS or shape.user_data == layer:
+                yield transform, shape
+        else:
+            stack.pop()
+
+
+class _Hierarchy:
+    """
+    Walking the rects and segments of nested groups and arrays without copying them
+    """
+
+    def walk(
+        self, layer: Any = _ALL_LAYERS, window: Optional[Rect] = None
+    ) -> Generator[Tuple[Transform, Leaf], None, None]:
+        """
+        Yield every rect and segment inside this group, nested groups and arrays,
+        together with the transform that places it. Nothing is copied or moved,
+        pending transforms are accumulated instead. The shapes are in the coordinates
+        before the transform, change them through their groups and not in place.
+
+        >>> inner = Group([Rect[0:1, 0:1, 'poly']]).copy()
+        >>> g = Group([Rect[0:4, 0:1, 'metal'], inner])
+        >>> inner.x += 10
+        >>> for transform, shape in g.walk():
+        ...     print(shape, transform.dx)
+        [0:4, 0:1] 'metal' 0
+        [0:1, 0:1] 'poly' 10.0
+
+        Only shapes with the given ``user_data`` are yielded if a ``layer`` is given,
+        only shapes overlapping the ``window`` if that is given. Nested groups outside of
+        the window are skipped as a whole, and the :attr:`index` of a group is used
+        if it exists, which may change the order of the shapes.
+
+        >>> [shape for _, shape in g.walk(layer='poly')]
+        [[0:1, 0:1] 'poly']
+
+        >>> [shape for _, shape in g.walk(window=Rect[9:12, 0:1])]
+        [[0:1, 0:1] 'poly']
+
+        The hierarchy is walked without recursion, so it may be arbitrarily deep.
+
+        >>> deep = Group([Rect[0:1, 0:1]])
+        >>> for _ in range(5000):
+        ...     deep = Group([deep])
+        >>> len(list(deep.walk()))
+        1
+        """
+        yield from _walk([(self, Transform())], layer, window)  # type: ignore
+
+    def views(
+        self, layer: Any = _ALL_LAYERS, window: Optional[Rect] = None
+    ) -> Generator[ShapeView, None, None]:
+        """
+        Like :meth:`walk`, but yield read-only views of the rects and segments with all
+        transforms applied.
+
+        >>> r = Rect[5:6, 0:1]
+        >>> g = Group([Group([Rect[0:1, 0:1]]), r]).copy()
+        >>> g.rotate(180)
+        >>> list(g.views())
+        [[5:6, 0:1], [0:1, 0:1]]
+        >>> r  # the shapes have not been changed by the views
+        [5:6, 0:1]
+        """
+        for transform, shape in self.walk(layer, window):
+            yield ShapeView.of(shape, transform)
+
+    def area(self, layer: Any = _ALL_LAYERS) -> Number:
+        """
+        The area that is covered by the rects and segments of a layer, or of all layers
+        if no layer is given. Overlapping shapes are counted once.
+
+        >>> g = Group([Rect[0:2, 0:2, 'metal'], Rect[1:3, 0:2, 'metal'], Rect[0:1, 0:1, 'via']])
+        >>> g.area('metal')
+        6
+        >>> g.area()
+        6
+        """
+        return area(self.views(layer))
+
+    def areas(self) -> Dict[Any, Number]:
+        """
+        The covered area of every layer, see :meth:`area`.
+
+        >>> Group([Rect[0:2, 0:2, 'metal'], Rect[0:1, 0:1, 'via']]).areas()
+        {'metal': 4, 'via': 1}
+        """
+        layers: Dict[Any, List[ShapeView]] = {}
+        for view in self.views():
+            layers.setdefault(view.user_data, []).append(view)
+        return {layer: area(views) for layer, views in layers.items()}
+
+    def coverage(self, layer: Any = _ALL_LAYERS) -> float:
+        """
+        The share of the bounding box that is covered by a layer, or by all layers if no
+        layer is given.
+
+        >>> g = Group([Rect[0:2, 0:4, 'metal'], Rect[2:4, 0:1, 'metal'], Rect[3:4, 3:4, 'via']])
+        >>> g.coverage('metal')
+        0.625
+        >>> g.coverage()
+        0.6875
+        """
+        bbox = self.bbox  # type: ignore
+        if bbox is None or not bbox.width * bbox.height:
+            return 0.0
+        return self.area(layer) / (bbox.width * bbox.height)  # type: ignore
+
+    def density(
+        self,
+        tile_width: Number,
+        tile_height: Number,
+        layer: Any = _ALL_LAYERS,
+        window: Optional[Rect] = None,
+    ) -> 'array[float]':
+        """
+        The covered share of every tile of a grid over the ``window``, which is the
+        bounding box by default. Only the given layer is counted, if one is given.
+        See :func:`geometry.density.density` for the layout of the result.
+
+        >>> g = Group([Rect[0:4, 0:1, 'metal'], Rect[0:1, 0:4, 'poly']])
+        >>> g.density(2, 2, 'metal')
+        array('d', [0.5, 0.5, 0.0, 0.0])
+        """
+        if window is None:
+            window = self.bbox  # type: ignore
+            if window is None:
+                return array('d')
+        return density(self.views(layer, window), window, tile_width, tile_height)
+
+    def nets(self, connections: Iterable[Tuple[Any, Any]] = ()) -> Nets:
+        """
+        Find the nets of touching or overlapping rects and segments on connected layers,
+        see :func:`geometry.connect.connectivity`. The shapes of the result are views.
+
+        Check that a route connects its pins
+
+        >>> from geometry import Point
+        >>> pins = Group([Rect[-1:1, -1:1, 'pin'], Rect[9:11, 9:11, 'pin']])
+        >>> route = Group.path_from_points(1, Point(0, 0), Point(10, 0), Point(10, 10))
+        >>> nets = Group([pins, route]).nets([('pin', None)])
+        >>> nets.net_of(pins[0]) == nets.net_of(pins[1])
+        True
+        """
+        return connectivity(self.views(), connections)
+
+    def check(self, rules: Sequence[Rule]) -> List[Violation]:
+        """
+        Check the rects and segments of this group and all nested groups against
+        design rules, see :func:`geometry.drc.check`.
+
+        Nested groups and arrays that are placed many times, like the cells of
+        :meth:`Group.grid`, are checked only once, see :func:`geometry.drc.check_hierarchy`.
+
+        >>> from geometry.drc import MinSpacing
+        >>> g = Group([Rect[0:2, 0:2, 'metal'], Group([Rect[3:5, 0:2, 'metal']])])
+        >>> [violation.marker for violation in g.check([MinSpacing('metal', 2)])]
+        [[2:3, 0:2]]
+
+        >>> cell = Group([Rect[0:1, 0:1, 'metal'], Rect[2:3, 0:1, 'metal']])
+        >>> len(cell.grid(1000, 'right', 1, 'up').check([MinSpacing('metal', 2)]))
+        1000
+        """
+        return check_hierarchy(self, rules)
+
+    def merged(self) -> 'Group':
+        """
+        Merge the overlapping and touching rects and segments of every layer, i.e. with
+        the same ``user_data``, into as few disjoint rects as possible.
+
+        Nested groups and arrays are merged as well, the result is a flat group.
+
+        >>> from geometry import Point
+        >>> path = Group.path_from_points(2, Point(0, 0), Point(10, 0), Point(10, 10))
+        >>> g = Group([path, Rect[0:2, 0:2, 'via'], Rect[1:3, 0:2, 'via']])
+        >>> g.merged()
+        {[0:11, -1:1], [9:11, 1:10], [0:3, 0:2] 'via'} [0:11, -1:10]
+        """
+        layers: Dict[Any, List[ShapeView]] = {}
+        for view in self.views():
+            layers.setdefault(view.user_data, []).append(view)
+        return Group([rect for layer, views in layers.items() for rect in merge(views, layer)])
+
+    def boolean(
+        self,
+        operation: str,
+        other: Optional['_Hierarchy'] = None,
+        layer: Any = _ALL_LAYERS,
+        other_layer: Any = _ALL_LAYERS,
+        user_data: Any = None,
+    ) -> 'Group':
+        """
+        Combine the area of this group with another group, and return a flat group of
+        disjoint rects with the given ``user_data``.
+        The ``operation`` is one of ``'and'``, ``'or'``, ``'xor'`` or ``'not'``
+        (this group, but not the other one).
+
+        >>> first = Group([Rect[0:4, 0:2]])
+        >>> second = Group([Rect[2:6, 0:2]])
+        >>> first.boolean('and', second)
+        {[2:4, 0:2]} [2:4, 0:2]
+        >>> first.boolean('xor', second, user_data='diff')
+        {[0:2, 0:2] 'diff', [4:6, 0:2] 'diff'} [0:6, 0:2]
+
+        Use ``layer`` and ``other_layer`` to combine only some layers. If no other group
+        is given, two layers of this group are combined.
+
+        >>> g = Group([Rect[0:4, 0:4, 'metal'], Rect[1:2, 1:2, 'via'], Rect[8:9, 0:1, 'via']])
+        >>> g.boolean('not', layer='via', other_layer='metal', user_data='error')
+        {[8:9, 0:1] 'error'} [8:9, 0:1]
+        """
+        second = self if other is None else other
+        rects = boolean(self.views(layer), second.views(other_layer), operation, user_data)
+        return Group([*rects])
+
+    def subtract(self, cutters: Union['_Hierarchy', Iterable[Leaf]]) -> 'Group':
+        """
+        Cut the given shapes out of every rect and segment in this group, e.g. to punch
+        keep-out regions through a fill. The rest is returned as a flat group of rects,
+        which keep their ``user_data``. Nested groups are cut as well.
+
+        >>> fill = Group([Rect[0:10, 0:2, 'metal'], Group([Rect[0:10, 4:6, 'metal']])])
+        >>> fill.subtract([Rect[4:5, -1:7]])
+        {[0:4, 0:2] 'metal', [5:10, 0:2] 'metal', [0:4, 4:6] 'metal', [5:10, 4:6] 'metal'} ...
+
+        Cutting only touches the shapes next to each cutter, because the cutters are
+        looked up in a :class:`SpatialIndex`.
+        """
+        shapes: Iterable[Any] = cutters.views() if isinstance(cutters, _Hierarchy) else cutters
+        return Group([*subtract(self.views(), shapes)])
 
 
 Self = TypeVar('Self', bound='BaseGroup')
 
 
 @dataclass
-class BaseGroup(CanTranslate):
+class BaseGroup(CanTranslate, _Hierarchy, _Placement):
+    # shapes and bbox are properties of _Placement, a default factory (instead of a
+    # default value) keeps dataclass from hiding them behind a class attribute
     shapes: List[Shape] = field(default_factory=list)
-    bbox: Optional[Rect] = field(default=None)
+    bbox: Optional[Rect] = field(default_factory=lambda: None)
+    index: Optional[SpatialIndex[Shape]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _extents: Optional[_Extents] = field(default=None, init=False, repr=False, compare=False)
+    # the boxes of the shapes that are about to change, under which the index finds them,
+    # None for shapes that were empty and therefore not in the index
+    _moving: Optional[Dict[int, Optional[Box]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
         self.update()
 
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._extents = None
+        for shape in self._shapes:
+            shape._attach(self)
+
+    @property
+    def transform(self) -> Transform:
+        """
+        The transform that is still pending for the contained shapes.
+
+        Moving a group whose shapes nobody else holds only changes this transform, which
+        takes constant time, no matter how many shapes are inside the group.
+
+        >>> g = Group([Rect[0:2, 0:2]])
+        >>> g.x += 10
+        >>> g.transform
+        Transform(dx=10.0, dy=0, rotation=0, mirror=False, magnification=1)
+
+        Shapes that you hold must always show where they are. The first move after
+        shapes were handed to the group or read from it counts their references, and
+        the group moves the shapes right away if somebody else still holds them.
+
+        >>> r = g.shapes[0]
+        >>> g.x += 10
+        >>> r
+        [20:22, 0:2]
+        >>> g.transform.is_identity
+        True
+
+        Nobody else holds the shapes of a copy until its :attr:`shapes` are read, see
+        :meth:`copy`.
+
+        >>> placed = g.copy()
+        >>> placed.x += 10
+        >>> placed.transform
+        Transform(dx=10.0, dy=0, rotation=0, mirror=False, magnification=1)
+
+        The transform is applied to the shapes when :attr:`shapes` is accessed.
+        Nested groups only receive the transform, so that is only one level deep.
+
+        >>> placed.shapes
+        [[30:32, 0:2]]
+        >>> placed.transform.is_identity
+        True
+        >>> r
+        [20:22, 0:2]
+        """
+        return self._transform
+
+    def _place(self, transform: Transform) -> None:
+        self._transform = self._transform.then(transform)
+
+    def _apply(self, transform: Transform) -> None:
+        self._will_change()
+        self._move(transform)
+
+    def _move(self, transform: Transform) -> None:
+        # the parents and borrowers have been told about the change already
+        self._place(transform)
+        if not self._transform.is_identity and not self._exclusive():
+            self._flush()
+        self._changed()
+
+    def _exclusive(self) -> bool:
+        # Whether nobody else holds the list or the shapes of a shared group, which is
+        # found by counting references. Besides this group, its index holds the shapes.
+        # Anybody else, including borrowing copies and other groups, makes it held.
+        if not self._shared:
+            return True
+        if self._borrowed is None:
+            shapes = list(self._shapes)
+        else:
+            shapes = [shape for shape in self._shapes if id(shape) not in self._borrowed]
+        # the stale shapes are referenced as well, updating the bounding box drops them
+        self._local_bbox()
+        indexed = self.index is not None
+        if max(map(getrefcount, [self._shapes])) > _COUNTED + 1:
+            return False
+        if shapes and max(map(getrefcount, shapes)) > _COUNTED + 1 + indexed:
+            return False
+        nested = (shape for shape in shapes if isinstance(shape, BaseGroup))
+        if not all(group._exclusive() for group in nested):
+            return False
+        self._shared = False
+        return True
+
+    def _materialize(self) -> None:
+        if self._transform.is_identity:
+            return
+
+        # Borrowers copy this group and the parents apply their transforms to it, while
+        # the shapes still match the transform.
+        self._will_change()
+        self._flush()
+
+    def _flush(self) -> None:
+        self._own_all()
+
+        # Translated shapes that only belong to this group are shifted without telling
+        # it. The other shapes notify this group, the applying flag keeps it from passing
+        # that on, because its own geometry does not change. The bounding box, the
+        # extents and the index are moved as a whole.
+        transform, self._transform = self._transform, Transform()
+        dx, dy = transform.dx, transform.dy
+        translation = transform.is_translation
+        # a shape that is contained twice is still moved once
+        shapes: Iterable[Shape] = dict(zip(map(id, self._shapes), self._shapes)).values()
+        self._applying = True
+        for shape in _shift(shapes, dx, dy) if translation else shapes:
+            shape._apply(transform)
+        self._applying = False
+        self._moving = None
+
+        bbox = self._bbox
+        if bbox is not None:
+            self._bbox = Rect(*transform.rect(bbox.x, bbox.y, bbox.width, bbox.height))
+
+        if not translation:
+            self._extents = None
+            self._stale = None
+        elif self._extents is not None:
+            self._extents.shift(dx, dy)
+
+        if self.index is None:
+            pass
+        elif translation:
+            self.index.shift(dx, dy)
+        else:
+            self.index = SpatialIndex.bulk_load(self._indexed(), self.index.capacity)
+
+    def _indexed(self) -> List[Shape]:
+        # empty nested groups are left out of the index, see _extent
+        return [shape for shape in self._shapes if _extent(shape) is not None]
+
+    def _before_change(self, child: Observable) -> None:
+        if self._applying:
+            return
+        super()._before_change(child)
+        if self.index is None:
+            return
+        if self._moving is None:
+            self._moving = {}
+        if id(child) not in self._moving:
+            shape = cast(Shape, child)
+            self._moving[id(child)] = None if _extent(shape) is None else _box(shape)
+
+    def _invalidate(self, child: Optional[Observable] = None) -> None:
+        if self._applying:
+            return
+        if child is not None and self.index is not None:
+            self._reindex(child)
+        super()._invalidate(child)
+
+    def _reindex(self, child: Any) -> None:
+        # The box the child had before the change was recorded in _before_change,
+        # None if the child was empty and therefore not in the index.
+        assert self.index is not None
+        if self._moving and id(child) in self._moving:
+            old = self._moving.pop(id(child))
+            if old is not None:
+                self.index.remove(child, old)
+        elif _extent(child) is None:
+            # the child was not announced and is empty now, so its old box is unknown
+            self.index = SpatialIndex.bulk_load(self._indexed(), self.index.capacity)
+            return
+        else:
+            self.index.remove(child)
+        if _extent(child) is not None:
+            self.index.insert(child)
+
+    def _replace(self, clones: Dict[int, Shape]) -> None:
+        if self.index is not None:
+            for shape in self._shapes:
+                clone = clones.get(id(shape))
+                if clone is None or _extent(shape) is None:
+                    continue
+                if self.index.remove(shape):
+                    self.index.insert(clone)
+        super()._replace(clones)
+
+    def _placed_children(self, transform: Transform, window: Optional[Rect]) -> Iterator[Placed]:
+        # the shapes are handed out in local coordinates, see walk
+        self._shared = True
+        inner = self._transform.then(transform)
+        shapes: Iterable[Shape] = self._shapes
+        if window is not None and self.index is not None:
+            local = inner.inverse().rect(window.x, window.y, window.width, window.height)
+            shapes = list(self.index.query(Rect(*local)))
+        return ((shape, inner) for shape in shapes)
+
+    def _adopt(self, shape: Shape) -> None:
+        # new shapes are given in the coordinates of the group, not in local coordinates
+        if not self._transform.is_identity:
+            shape._apply(self._transform.inverse())
+
+    def _release(self, shape: Shape) -> None:
+        if not self._transform.is_identity:
+            shape._apply(self._transform)
+
+    def _known_bbox(self) -> Rect:
+        bbox = self.bbox
+        assert bbox is not None, "group has no shapes"
+        return bbox
+
     @property  # type: ignore
     def x(self) -> Number:  # type: ignore
         """
@@ -94,16 +800,12 @@ class BaseGroup(CanTranslate):
         >>> g.shapes[0]
         [9:11, -1:1]
         """
-        assert self.bbox is not None, "group has no shapes"
-        return self.bbox.x
+        return self._known_bbox().x
 
     @x.setter
     def x(self, value: Number) -> None:
-        assert self.bbox is not None, "group has no shapes"
-        offset = value - self.bbox.x
-        for shape in self.shapes:
-            shape.x += offset
-        self.bbox.x = value
+        self._will_change()
+        self._move(Transform(value - self._known_bbox().x, 0))
 
     @property  # type: ignore
     def y(self) -> Number:  # type: ignore
@@ -120,16 +822,12 @@ class BaseGroup(CanTranslate):
         >>> g.shapes[0]
         [-1:1, 9:11]
         """
-        assert self.bbox is not None, "group has no shapes"
-        return self.bbox.y
+        return self._known_bbox().y
 
     @y.setter
     def y(self, value: Number) -> None:
-        assert self.bbox is not None, "group has no shapes"
-        offset = value - self.bbox.y
-        for shape in self.shapes:
-            shape.y += offset
-        self.bbox.y = value
+        self._will_change()
+        self._move(Transform(0, value - self._known_bbox().y))
 
     @property
     def width(self) -> Number:  # type: ignore
@@ -139,8 +837,7 @@ class BaseGroup(CanTranslate):
         >>> Group([Rect[0:1, 0:2], Rect[9:10, 19:20]]).width
         10.0
         """
-        assert self.bbox is not None, "group has no shapes"
-        return self.bbox.width
+        return self._known_bbox().width
 
     @property
     def height(self) -> Number:  # type: ignore
@@ -150,41 +847,88 @@ class BaseGroup(CanTranslate):
         >>> Group([Rect[0:1, 0:2], Rect[9:10, 19:20]]).height
         20.0
         """
-        assert self.bbox is not None, "group has no shapes"
-        return self.bbox.height
+        return self._known_bbox().height
+
+    def _tracked(self) -> _Extents:
+        if self._extents is None:
+            self._extents = _Extents(self._shapes)
+            self._stale = None
+        return self._extents
+
+    def _compute_bbox(self) -> Optional[Rect]:
+        stale, self._stale = self._stale, None
+        if self._extents is None and stale is None:
+            # nothing was removed or changed, a single scan is cheaper than the heaps
+            scanned = [edges for edges in map(_extent, self._shapes) if edges is not None]
+            if not scanned:
+                return None
+            left, right, bottom, top = zip(*scanned)
+            return Rect.from_edges(min(left), max(right), min(bottom), max(top))
+
+        extents = self._tracked()
+        for shape in (stale or {}).values():
+            extents.refresh(shape)
+        return extents.bbox()
 
     def _update_bbox(self, shape: Shape) -> None:
-        if self.bbox is None:
-            self.bbox = Rect(shape.x, shape.y, shape.width, shape.height)
-
-        if shape.left < self.bbox.left:
-            self.bbox.stretch(left=shape.left)
-        if shape.right > self.bbox.right:
-            self.bbox.stretch(right=shape.right)
-        if shape.bottom < self.bbox.bottom:
-            self.bbox.stretch(bottom=shape.bottom)
-        if shape.top > self.bbox.top:
-            self.bbox.stretch(top=shape.top)
+        if self._extents is not None:
+            self._extents.add(shape)
+            self._invalidate()
+            return
+
+        if self._dirty:
+            return
+
+        extent = _extent(shape)
+        if extent is None:
+            return
+        left, right, bottom, top = extent
+        bbox = self._bbox
+        if bbox is None:
+            self._bbox = Rect.from_edges(left, right, bottom, top)
+        else:
+            if left < bbox.left:
+                bbox.stretch(left=left)
+            if right > bbox.right:
+                bbox.stretch(right=right)
+            if bottom < bbox.bottom:
+                bbox.stretch(bottom=bottom)
+            if top > bbox.top:
+                bbox.stretch(top=top)
+        self._changed()
 
     def update(self) -> None:
         """
         Recalculate the bounding box for all contained shapes.
 
-        This is necessary when you manually change a shape after you
-        added it to the group.
+        Shapes tell the groups they were added to when they change, so the bounding
+        box stays correct without calling this method. Nested groups pass the change
+        on to their parents.
 
         >>> r = Rect[2, 4]
-        >>> g = Group([r])
+        >>> g = Group([Group([r])])
         >>> r.bottom_left = Point(0, 0)
         >>> r in g.bbox
-        False
+        True
+
+        The bounding box is only recomputed when it is accessed. This is only
+        necessary when you change the list of :attr:`shapes` directly.
 
+        >>> g.shapes.append(Rect[10:12, 0:1])
+        >>> g.bbox
+        [0:2, 0:4]
         >>> g.update()
-        >>> r in g.bbox
-        True
+        >>> g.bbox
+        [0:12, 0:4]
         """
-        for shape in self.shapes:
-            self._update_bbox(shape)
+        for shape in self._shapes:
+            shape._attach(self)
+        self._extents = None
+        self._stale = None
+        if self.index is not None:
+            self.index = SpatialIndex.bulk_load(self._indexed(), self.index.capacity)
+            self._moving = None
+        self._invalidate()
 
     @_deprecate('Group.append')
     def add(self: Self, shape: Shape) -> Self:  # pragma: no cover
@@ -202,8 +946,284 @@ class BaseGroup(CanTranslate):
         >>> g.bbox
         [0:12, 0:3]
         """
-        self.shapes.append(shape)
+        self._will_change()
+        self._expose()
+        self._adopt(shape)
+        self._shapes.append(shape)
+        self._remember(shape)
+
+    def _remember(self, shape: Shape) -> None:
+        shape._attach(self)
         self._update_bbox(shape)
+        if self.index is not None and _extent(shape) is not None:
+            self.index.insert(shape)
+
+    def _forget(self, shape: Shape) -> None:
+        # the extents must be tracked before the shape is taken out of the list
+        assert self._extents is not None
+        # the index finds the shape by its box, which is in local coordinates
+        if self.index is not None:
+            old = self._moving.pop(id(shape), None) if self._moving else None
+            if old is not None:
+                self.index.remove(shape, old)
+            elif _extent(shape) is not None:
+                self.index.remove(shape)
+        if not self._extents.remove(shape):
+            shape._detach(self)
+            self._release(shape)
+        self._invalidate()
+
+    def __len__(self) -> int:
+        return len(self._shapes)
+
+    def __iter__(self) -> Iterator[Shape]:
+        return iter(self.shapes)
+
+    @overload
+    def __getitem__(self, index: int) -> Shape:
+        ...  # pragma: no cover
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Shape]:
+        ...  # pragma: no cover
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Shape, List[Shape]]:
+        """
+        Access the contained shapes by index or slice
+
+        >>> g = Group([Rect[0:1, 0:1], Rect[1:2, 0:1], Rect[2:3, 0:1]])
+        >>> g[0]
+        [0:1, 0:1]
+        >>> g[1:]
+        [[1:2, 0:1], [2:3, 0:1]]
+        >>> len(g)
+        3
+        """
+        return self.shapes[index]
+
+    def __setitem__(self, index: Union[int, slice], value: Any) -> None:
+        """
+        Replace one shape or a slice of shapes. The bounding box will be updated.
+
+        >>> g = Group([Rect[0:1, 0:1], Rect[1:2, 0:1], Rect[2:3, 0:1]])
+        >>> g[2] = Rect[2:3, 0:5]
+        >>> g.bbox
+        [0:3, 0:5]
+        >>> g[1:] = [Rect[1:2, 0:1]]
+        >>> g
+        {[0:1, 0:1], [1:2, 0:1]} [0:2, 0:1]
+
+        The parents of the group see the change, and so does their :attr:`index`.
+
+        >>> inner = Group([Rect[0:1, 0:1]])
+        >>> top = Group([inner, Rect[5:6, 5:6]])
+        >>> _ = top.build_index()
+        >>> inner[0] = Rect[2:3, 0:1]
+        >>> top.query(Rect[2:3, 0:1])
+        [{[2:3, 0:1]} [2:3, 0:1]]
+        """
+        self._will_change()
+        self._expose()
+        self._own_at(index)
+        self._tracked()
+        new = list(value) if isinstance(index, slice) else [value]
+        for shape in new:
+            self._adopt(shape)
+
+        if isinstance(index, slice):
+            old = self._shapes[index]
+            self._shapes[index] = new
+        else:
+            old = [self._shapes[index]]
+            self._shapes[index] = value
+
+        # the new shapes come first, so that a nested group is never empty in between
+        for shape in new:
+            self._remember(shape)
+        for shape in old:
+            self._forget(shape)
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        """
+        Remove one shape or a slice of shapes. The bounding box will shrink.
+
+        >>> g = Group([Rect[0:1, 0:1], Rect[1:2, 0:1], Rect[2:3, 0:5]])
+        >>> del g[-1]
+        >>> g.bbox
+        [0:2, 0:1]
+        >>> del g[:1]
+        >>> g
+        {[1:2, 0:1]} [1:2, 0:1]
+
+        An empty nested group is left out of the bounding box of its parents, until it
+        gets shapes again.
+
+        >>> inner = Group([Rect[0:1, 0:1]])
+        >>> outer = Group([inner, Rect[5:6, 5:6]])
+        >>> del inner[0]
+        >>> outer.bbox
+        [5:6, 5:6]
+        >>> inner.append(Rect[8:9, 0:1])
+        >>> outer.bbox
+        [5:9, 0:6]
+        """
+        self._will_change()
+        self._own_at(index)
+        self._tracked()
+        old = self._shapes[index] if isinstance(index, slice) else [self._shapes[index]]
+        del self._shapes[index]
+        for shape in old:
+            self._forget(shape)
+
+    def remove(self, shape: Shape) -> None:
+        """
+        Remove the first occurrence of a shape. The bounding box will shrink.
+
+        >>> r = Rect[4:5, 4:5]
+        >>> g = Group([Rect[0:1, 0:1], r])
+        >>> g.remove(r)
+        >>> g.bbox
+        [0:1, 0:1]
+        """
+        del self[self.shapes.index(shape)]
+
+    def pop(self, index: int = -1) -> Shape:
+        """
+        Remove and return the shape at the given position (default last).
+
+        >>> g = Group([Rect[0:1, 0:1], Rect[4:5, 4:5]])
+        >>> g.pop()
+        [4:5, 4:5]
+        >>> g.bbox
+        [0:1, 0:1]
+        """
+        self._own_at(index)
+        shape = self._shapes[index]
+        del self[index]
+        return shape
+
+    def _own_at(self, index: Union[int, slice]) -> None:
+        if self._borrowed:
+            shapes = self._shapes[index] if isinstance(index, slice) else [self._shapes[index]]
+            for shape in shapes:
+                self._own(shape)
+
+    def clear(self) -> None:
+        """
+        Remove all shapes from the group.
+
+        >>> g = Group([Rect[0:1, 0:1]])
+        >>> g.clear()
+        >>> g
+        {}
+        """
+        self._will_change()
+        self._disown()
+        for shape in self._shapes:
+            shape._detach(self)
+            self._release(shape)
+        self._shapes.clear()
+        self._transform = Transform()
+        self._extents = None
+        self._stale = None
+        if self.index is not None:
+            self.index = SpatialIndex(self.index.capacity)
+            self._moving = None
+        self.bbox = None
+        self._changed()
+
+    def build_index(self, capacity: int = 16) -> SpatialIndex[Shape]:
+        """
+        Bulk load a spatial index over the contained shapes. Once the index is built,
+        it is kept up to date by :meth:`append` and :meth:`extend` and it is used
+        by :meth:`query`.
+
+        >>> g = Group([Rect[0:1, 0:1], Rect[4:5, 4:5]])
+        >>> len(g.build_index())
+        2
+        >>> g.append(Rect[8:9, 8:9])
+        >>> len(g.index)
+        3
+
+        Like the bounding box, the index notices if you change a shape inside the group.
+
+        >>> g[0].x = 6.5
+        >>> g.query(Rect[5:7, 0:2])
+        [[6:7, 0:1]]
+        >>> g.query(Rect[0:2, 0:2])
+        []
+        """
+        self.index = SpatialIndex.bulk_load(self._indexed(), capacity)
+        self._moving = None
+        return self.index
+
+    def query(self, window: Rect) -> List[Shape]:
+        """
+        Return all shapes that overlap the given window. Shapes that only touch the
+        window are not included.
+
+        If the group has an :attr:`index`, only the shapes near the window are checked.
+        Otherwise every shape is checked.
+
+        >>> g = Group([Rect[0:1, 0:1], Rect[4:5, 4:5], Rect[0:2, 4:6]])
+        >>> g.query(Rect[0:3, 3:7])
+        [[0:2, 4:6]]
+
+        >>> _ = g.build_index()
+        >>> g.query(Rect[0:3, 3:7])
+        [[0:2, 4:6]]
+        """
+        self._expose()
+        if self.index is not None:
+            return list(self.index.query(window))
+        return [
+            shape
+            for shape in self.shapes
+            if shape.left < window.right
+            and shape.right > window.left
+            and shape.bottom < window.top
+            and shape.top > window.bottom
+        ]
+
+    def _leaves(self) -> Generator[Union[Leaf, ShapeView], None, None]:
+        stack: List[Iterator[Union[Shape, ShapeView]]] = [iter(self.shapes)]
+        while stack:
+            for shape in stack[-1]:
+                if isinstance(shape, BaseGroup):
+                    stack.append(iter(shape.shapes))
+                    break
+                if isinstance(shape, BaseGroupArray):
+                    # the cells share the shapes of the master, view them instead of copying
+                    cells = _walk(shape._placed_cells(Transform()), _ALL_LAYERS, None)
+                    stack.append(ShapeView.of(leaf, transform) for transform, leaf in cells)
+                    break
+                yield shape
+            else:
+                stack.pop()
+
+    def overlaps(
+        self,
+    ) -> Generator[Tuple[Union[Leaf, ShapeView], Union[Leaf, ShapeView], Rect], None, None]:
+        """
+        Report every pair of overlapping rects or segments in this group and all nested
+        groups, together with their intersection.
+
+        The pairs are found with a sweep line, so shapes that are far apart are never
+        compared with each other.
+
+        >>> g = Group([Rect[0:2, 0:2], Group([Rect[1:3, 1:3], Rect[5:6, 5:6]])])
+        >>> list(g.overlaps())
+        [([0:2, 0:2], [1:3, 1:3], [1:2, 1:2])]
+
+        The cells of arrays are reported as read-only views (see :class:`ShapeView`)
+        of the shapes of their master, which are not copied.
+
+        >>> g = Group([Group([Rect[0:2, 0:1]]).grid(3, 'right', 1, 'up'), Rect[3:4, 0:4]])
+        >>> for first, second, _ in g.overlaps():
+        ...     print(first, second, type(first).__name__)
+        [2:4, 0:1] [3:4, 0:4] ShapeView
+        """
+        yield from overlapping_pairs(self._leaves())
 
     def __copy__(self: Self) -> Self:
         """
@@ -222,12 +1242,41 @@ class BaseGroup(CanTranslate):
         {[0:4, 0:4]} ...
         >>> copied
         {[0:2, 0:4]} ...
+
+        The copy is copy-on-write: it shares the shapes with the original until one
+        of them is about to change, or until the :attr:`shapes` of the copy are read.
+        Only then the shape is copied, so copying a large group is cheap.
+
+        >>> big = Group([Rect[i:i + 1, 0:1] for i in range(1000)])
+        >>> copied = big.copy()
+        >>> copied.x += 10
+        >>> copied.bbox
+        [10:1010, 0:1]
+        >>> big[0].right = 5
+        >>> copied._shapes[0] is big[0], copied._shapes[1] is big[1]
+        (False, True)
+        >>> copied.shapes[0], big.shapes[0]
+        ([10:11, 0:1], [4:5, 0:1])
         """
-        shapes = [shape.copy() for shape in self.shapes]
-        return type(self)(shapes)
+        copied = type(self)()
+        copied._shapes = list(self._shapes)
+        copied._borrowed = {}
+        for shape in self._shapes:
+            if id(shape) not in copied._borrowed:
+                copied._borrowed[id(shape)] = shape
+                shape._lend(copied)
+        copied._transform = self._transform
+        # a dirty copy would not tell the group it ends up in about changes
+        bbox = self._local_bbox()
+        if bbox is not None:
+            copied._bbox = Rect(bbox.x, bbox.y, bbox.width, bbox.height)
+        copied._dirty = False
+        return copied
 
     def __str__(self) -> str:
-        inner = ", ".join(str(shape) for shape in self.shapes)
+        # printing does not hand out the shapes
+        self._materialize()
+        inner = ", ".join(str(shape) for shape in self._shapes)
         bbox = "" if self.bbox is None else f" {self.bbox}"
         return f"{{{inner}}}{bbox}"
 
@@ -249,11 +1298,28 @@ class Group(HasUserData, AppendMany[Shape], BaseGroup):
     >>> Group([Rect[0:3, 0:3], Rect[2, 2]])
     {[0:3, 0:3], [-1:1, -1:1]} [-1:3, -1:3]
 
+    The bounding box follows changes to the contained shapes and nested groups.
+
+    >>> r = Rect[0:1, 0:1]
+    >>> g = Group([Group([r])])
+    >>> r.right = 5
+    >>> g.bbox
+    [4:5, 0:1]
+
+    Moving a group moves the shapes you hold as well. Copies of a group move in
+    constant time, see :attr:`transform`.
+
+    >>> g.x += 10
+    >>> r
+    [14:15, 0:1]
+    >>> r.x += 1
+    >>> g.shapes
+    [{[15:16, 0:1]} [15:16, 0:1]]
+
     .. warning ::
 
-        The group does not keep track of changes to the contained shapes.
-        If you manually change shapes that are inside a group, you must :meth:`update`
-        the group.
+        The group does not notice if you change the list of :attr:`shapes` directly.
+        In that case, you must :meth:`update` the group.
     """
 
     @classmethod
@@ -323,11 +1389,11 @@ class Group(HasUserData, AppendMany[Shape], BaseGroup):
 
     def grid(
         self, x_steps: int, x_direction: str, y_steps: int, y_direction: str
-    ) -> Generator[Tuple[int, int, 'Group'], None, None]:
+    ) -> 'GroupArray':
         """
-        Span a grid of copies of this group.
+        Span a grid of instances of this group.
 
-        group.grid(5, 'right', 3, 'down') will create a grid of 5 times 3 copies
+        group.grid(5, 'right', 3, 'down') will create a grid of 5 times 3 cells
 
 
         ::
@@ -338,49 +1404,35 @@ class Group(HasUserData, AppendMany[Shape], BaseGroup):
 
         X is the initial group.
 
-        The generator yield a tuple of the column number, row number and the group copy.
+        The cells are not copied, the returned :class:`GroupArray` refers to this group.
+        Iterating over the array yields a tuple of the column number, row number and
+        a copy of the group for that cell.
 
         >>> g = Group([Rect[2, 5]])
         >>> [cell.center for x, y, cell in g.grid(3, 'right', 2, 'up')]
         [(0, 0), (2, 0), (4, 0), (0, 5), (2, 5), (4, 5)]
-        """
-        x_end = _DIRECTION.get(x_direction, x_direction)
-        y_end = _DIRECTION.get(y_direction, y_direction)
-        x_start = _OPPOSITES[x_end]
-        y_start = _OPPOSITES[y_end]
-        for y, rows in self._grid_1d(y_start, y_end, y_steps):
-            for x, cell in rows._grid_1d(x_start, x_end, x_steps):
-                yield x, y, cell
-
-    def _grid_1d(
-        self, target: str, source: str, times: int
-    ) -> Generator[Tuple[int, 'Group'], None, None]:
-        copy = self.copy()
-        yield 0, copy.copy()
-
-        for i in range(1, times):
-            setattr(copy, target, getattr(copy, source))
-            yield i, copy.copy()
-
-    def _flip_horizontally(self) -> None:
-        x = self.x
-
-        for shape in self.shapes:
-            distance = shape.x - x
-            shape.x = x - distance
-
-            if isinstance(shape, Group):
-                shape._flip_horizontally()
-
-    def _flip_vertically(self) -> None:
-        y = self.y
-
-        for shape in self.shapes:
-            distance = shape.y - y
-            shape.y = y - distance
 
-            if isinstance(shape, Group):
-                shape._flip_vertically()
+        >>> g.grid(100, 'right', 100, 'down').bbox
+        [-1:199, -497.5:2.5]
+        """
+        bbox = self._known_bbox()
+        column = _STEPS[x_direction]
+        row = _STEPS[y_direction]
+        return GroupArray(
+            self,
+            x_steps,
+            y_steps,
+            Point(column.x * bbox.width, column.y * bbox.height),
+            Point(row.x * bbox.width, row.y * bbox.height),
+        )
+
+    def _center(self) -> Point:
+        bbox = self._known_bbox()
+        return Point(bbox.x, bbox.y)
+
+    def _orient(self, rotation: int, mirror: bool) -> None:
+        self._will_change()
+        self._move(Transform.around(self._center(), rotation, mirror))
 
     def flip(self, *, horizontally: bool = False, vertically: bool = False) -> None:
         """
@@ -388,8 +1440,10 @@ class Group(HasUserData, AppendMany[Shape], BaseGroup):
 
         Either horizontally or vertically or both.
 
-        Note: this actually modified the contained shapes. If you don't want
-        that behaviour, copy the group first: ``group.copy().flip(...)``
+        Note: this actually modifies the contained shapes. If you don't want
+        that behaviour, copy the group first: ``group.copy().flip(...)``.
+        Flipping the copy only changes its pending :attr:`transform`, which takes
+        constant time.
 
         ::
 
@@ -417,9 +1471,243 @@ class Group(HasUserData, AppendMany[Shape], BaseGroup):
         [1:2, 0:1]
         >>> bottom_right  # is now top left
         [0:1, 2:3]
+
+        Segments change their direction
+
+        >>> from geometry import Direction
+        >>> g = Group([Segment(0, 0, 4, 2, Direction.right), Rect[4:6, 0:2]])
+        >>> g.flip(horizontally=True)
+        >>> g.shapes
+        [[2:6, -1:1] (left), [-2:0, 0:2]]
+        """
+
+        if horizontally and vertically:
+            self._orient(180, False)
+        elif horizontally:
+            self._orient(180, True)
+        elif vertically:
+            self._orient(0, True)
+
+    def rotate(self, angle: int) -> None:
+        """
+        Rotate the group counter clockwise around its center by 90, 180 or 270 degrees.
+
+        Like :meth:`flip`, this modifies the contained shapes, unless the group is a copy.
+
+        >>> r = Rect[0:1, 2:3]
+        >>> g = Group([Rect[0:4, 0:2], r])
+        >>> g.rotate(90)
+        >>> g.bbox
+        [0.5:3.5, -0.5:3.5]
+        >>> r
+        [0.5:1.5, -0.5:0.5]
+        >>> r.stretch(right=r.right + 2)
+        [0.5:3.5, -0.5:0.5]
+        """
+        assert angle % 90 == 0, "only multiples of 90 degrees are supported"
+        self._orient(angle % 360, False)
+
+    def magnify(self, factor: Number) -> None:
         """
+        Scale the group by a factor, keeping its center in place.
 
-        if horizontally:
-            self._flip_horizontally()
-        if vertically:
-            self._flip_vertically()
+        Like :meth:`flip`, this modifies the contained shapes, unless the group is a copy.
+
+        >>> r = Rect[2:4, 2:4]
+        >>> g = Group([Rect[0:2, 0:2], r])
+        >>> g.magnify(2)
+        >>> g.bbox
+        [-2:6, -2:6]
+        >>> r
+        [2:6, 2:6]
+        """
+        assert factor > 0, "magnification must be positive"
+        self._will_change()
+        center = self._center()
+        to_origin = Transform(-center.x, -center.y)
+        scale = Transform(magnification=factor)
+        self._move(to_origin.then(scale).then(Transform(center.x, center.y)))
+
+
+@dataclass
+class BaseGroupArray(CanTranslate, _Hierarchy, Observer):
+    master: Group
+    columns: int
+    rows: int
+    column_step: Point
+    row_step: Point
+    transform: Transform = Transform()
+
+    # assigning the fields of a borrowed array gives the borrowing groups a copy first
+    _notifying = dict.fromkeys(
+        ('master', 'columns', 'rows', 'column_step', 'row_step', 'transform'), False
+    )
+
+    def __post_init__(self) -> None:
+        assert self.columns > 0 and self.rows > 0, "an array needs at least one cell"
+        self.master._attach(self)
+        self._invalidate()
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.master._attach(self)
+
+    def _apply(self, transform: Transform) -> None:
+        # the transform field tells the parents and borrowers
+        self.transform = self.transform.then(transform)
+        self._invalidate()
+
+    def _offset(self, column: int, row: int) -> Transform:
+        dx = column * self.column_step.x + row * self.row_step.x
+        dy = column * self.column_step.y + row * self.row_step.y
+        return Transform(dx, dy).then(self.transform)
+
+    def _placed_cells(self, transform: Transform) -> Iterator[Placed]:
+        return ((self.master, cell.then(transform)) for _, _, cell in self.cells())
+
+    def _compute_bbox(self) -> Optional[Rect]:
+        bbox = self.master.bbox
+        if bbox is None:
+            return None
+
+        last_column = self.column_step * (self.columns - 1)
+        last_row = self.row_step * (self.rows - 1)
+        local = Rect.from_edges(
+            bbox.left + min(0, last_column.x) + min(0, last_row.x),
+            bbox.right + max(0, last_column.x) + max(0, last_row.x),
+            bbox.bottom + min(0, last_column.y) + min(0, last_row.y),
+            bbox.top + max(0, last_column.y) + max(0, last_row.y),
+        )
+        return Rect(*self.transform.rect(local.x, local.y, local.width, local.height))
+
+    @property
+    def bbox(self) -> Optional[Rect]:
+        """
+        The bounding box of all cells, computed from the bounding box of the master group
+
+        >>> GroupArray(Group([Rect[0:1, 0:1]]), 3, 2, Point(2, 0), Point(0, 5)).bbox
+        [0:5, 0:6]
+        """
+        return self._local_bbox()
+
+    def _known_bbox(self) -> Rect:
+        bbox = self.bbox
+        assert bbox is not None, "master group has no shapes"
+        return bbox
+
+    @property
+    def x(self) -> Number:
+        """
+        The x coordinate of the center of the bounding box.
+        Setting it moves the whole array, but not the master group.
+        """
+        return self._known_bbox().x
+
+    @x.setter
+    def x(self, value: Number) -> None:
+        self._apply(Transform(value - self._known_bbox().x, 0))
+
+    @property
+    def y(self) -> Number:
+        """
+        The y coordinate of the center of the bounding box.
+        Setting it moves the whole array, but not the master group.
+        """
+        return self._known_bbox().y
+
+    @y.setter
+    def y(self, value: Number) -> None:
+        self._apply(Transform(0, value - self._known_bbox().y))
+
+    @property
+    def width(self) -> Number:  # type: ignore
+        return self._known_bbox().width
+
+    @property
+    def height(self) -> Number:  # type: ignore
+        return self._known_bbox().height
+
+    def __len__(self) -> int:
+        return self.columns * self.rows
+
+    def cells(self) -> Generator[Tuple[int, int, Transform], None, None]:
+        """
+        Yield the column, the row and the transform of every cell, row by row.
+        The transform places the shapes of the master group into that cell.
+
+        >>> a = GroupArray(Group([Rect[0:1, 0:1]]), 2, 2, Point(2, 0), Point(0, 5))
+        >>> [(column, row, t.dx, t.dy) for column, row, t in a.cells()]
+        [(0, 0, 0, 0), (1, 0, 2, 0), (0, 1, 0, 5), (1, 1, 2, 5)]
+        """
+        for row in range(self.rows):
+            for column in range(self.columns):
+                yield column, row, self._offset(column, row)
+
+    def cell(self, column: int, row: int) -> Group:
+        """
+        A copy of the master group, placed at the given cell
+
+        >>> a = GroupArray(Group([Rect[0:1, 0:1]]), 2, 2, Point(2, 0), Point(0, 5))
+        >>> a.cell(1, 1).shapes
+        [[2:3, 5:6]]
+        """
+        assert 0 <= column < self.columns and 0 <= row < self.rows, "cell is out of range"
+        copied = self.master.copy()
+        copied._place(self._offset(column, row))
+        return copied
+
+    def __iter__(self) -> Iterator[Tuple[int, int, Group]]:
+        for column, row, _ in self.cells():
+            yield column, row, self.cell(column, row)
+
+    def flatten(self) -> Group:
+        """
+        Copy the master group into every cell and collect the copies in a new group.
+        Only do this if you really need separate shapes for every cell.
+
+        >>> a = GroupArray(Group([Rect[0:1, 0:1]]), 2, 1, Point(2, 0), Point(0, 5))
+        >>> a.flatten()
+        {{[0:1, 0:1]} [0:1, 0:1], {[2:3, 0:1]} [2:3, 0:1]} [0:3, 0:1]
+        """
+        return Group([cell for _, _, cell in self])
+
+    def __str__(self) -> str:
+        inner = ", ".join(str(shape) for shape in self.master.shapes)
+        bbox = "" if self.bbox is None else f" {self.bbox}"
+        return f"{{{inner}}} {self.columns}x{self.rows}{bbox}"
+
+
+@dataclass(repr=False)
+class GroupArray(HasUserData, BaseGroupArray):
+    """
+    A regular grid of instances of one master group, see :meth:`Group.grid`.
+
+    The array only stores the master group, the number of columns and rows and
+    the steps between them. The cell in column ``i`` and row ``j`` is the master group
+    moved by ``i * column_step + j * row_step``. The bounding box, the cell
+    positions and the rendering on a :class:`Canvas` are computed from that, without
+    copying the master group.
+
+    >>> master = Group([Rect[0:1, 0:1]])
+    >>> array = master.grid(3, 'right', 2, 'up')
+    >>> array
+    {[0:1, 0:1]} 3x2 [0:3, 0:2]
+    >>> len(array)
+    6
+
+    Changes to the master group show up in every cell, the steps stay the same
+
+    >>> master.append(Rect[0:2, 0:1])
+    >>> array.bbox
+    [0:4, 0:2]
+
+    Arrays can be moved, rotated and nested like any other shape, the master group
+    stays where it is
+
+    >>> g = Group([array])
+    >>> g.x += 10
+    >>> g.shapes
+    [{[0:1, 0:1], [0:2, 0:1]} 3x2 [10:14, 0:2]]
+    >>> master.bbox
+    [0:2, 0:1]
+    """
@@ -0,0 +1,361 @@
+from math import ceil, sqrt
+from typing import Any, Callable, Generic, Generator, Iterable, List, Optional, Tuple, TypeVar
+
+from .point import Number
+
+T = TypeVar('T')
+
+Box = List[Number]
+Entry = Tuple[Box, T]
+
+
+def _box(shape: Any) -> Box:
+    return [shape.left, shape.bottom, shape.right, shape.top]
+
+
+def _merge(boxes: Iterable[Box]) -> Box:
+    left, bottom, right, top = zip(*boxes)
+    return [min(left), min(bottom), max(right), max(top)]
+
+
+def _area(box: Box) -> Number:
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+def _enlargement(box: Box, other: Box) -> Number:
+    merged = [
+        min(box[0], other[0]),
+        min(box[1], other[1]),
+        max(box[2], other[2]),
+        max(box[3], other[3]),
+    ]
+    return _area(merged) - _area(box)
+
+
+def _overlaps(box: Box, window: Box) -> bool:
+    return box[0] < window[2] and box[2] > window[0] and box[1] < window[3] and box[3] > window[1]
+
+
+def _touches(box: Box, window: Box) -> bool:
+    return (
+        box[0] <= window[2] and box[2] >= window[0] and box[1] <= window[3] and box[3] >= window[1]
+    )
+
+
+def _contains(box: Box, inner: Box) -> bool:
+    return box[0] <= inner[0] and box[1] <= inner[1] and box[2] >= inner[2] and box[3] >= inner[3]
+
+
+def _chunks(items: List[T], size: int) -> Generator[List[T], None, None]:
+    for start in range(0, len(items), size):
+        end = start + size
+        yield items[start:end]
+
+
+class _Node(Generic[T]):
+    __slots__ = ('box', 'children', 'is_leaf')
+
+    def __init__(self, children: List[Any], is_leaf: bool) -> None:
+        self.children = children
+        self.is_leaf = is_leaf
+        self.box: Box = self._children_box() if children else [0, 0, 0, 0]
+
+    def _child_box(self, child: Any) -> Box:
+        return child[0] if self.is_leaf else child.box  # type: ignore
+
+    def _children_box(self) -> Box:
+        return _merge(self._child_box(child) for child in self.children)
+
+
+def _pack(children: List[Any], capacity: int, is_leaf: bool) -> List[_Node[Any]]:
+    """
+    Sort-tile-recursive packing of one tree level
+    """
+
+    def center(child: Any, axis: int) -> Number:
+        box: Box = child[0] if is_leaf else child.box
+        return box[axis] + box[axis + 2]
+
+    nodes = ceil(len(children) / capacity)
+    slab_size = ceil(sqrt(nodes)) * capacity
+    children = sorted(children, key=lambda child: center(child, 0))
+
+    packed: List[_Node[Any]] = []
+    for slab in _chunks(children, slab_size):
+        slab.sort(key=lambda child: center(child, 1))
+        packed.extend(_Node[Any](chunk, is_leaf) for chunk in _chunks(slab, capacity))
+    return packed
+
+
+class SpatialIndex(Generic[T]):
+    """
+    An R-tree over shapes that answers window queries without scanning every shape.
+
+    The boxes of the shapes are captured when they are inserted. If a shape changes,
+    it has to be moved with :meth:`update`.
+
+    >>> from geometry import Rect
+    >>> shapes = [Rect[0:1, 0:1], Rect[5:6, 5:6], Rect[0:2, 4:6]]
+    >>> index = SpatialIndex.bulk_load(shapes)
+    >>> len(index)
+    3
+
+    >>> list(index.query(Rect[0:3, 3:7]))
+    [[0:2, 4:6]]
+
+    Touching the window is not enough, the shapes have to overlap it
+
+    >>> list(index.query(Rect[1:5, 1:4]))
+    []
+
+    New shapes are inserted one by one
+
+    >>> index.insert(Rect[2:4, 2:4])
+    >>> list(index.query(Rect[1:5, 1:4]))
+    [[2:4, 2:4]]
+    """
+
+    def __init__(self, capacity: int = 16) -> None:
+        assert capacity > 1, "capacity must be at least 2"
+        self.capacity = capacity
+        self._root: _Node[T] = _Node([], is_leaf=True)
+        self._size = 0
+
+    @classmethod
+    def bulk_load(cls, shapes: Iterable[T], capacity: int = 16) -> 'SpatialIndex[T]':
+        """
+        Build a packed index from many shapes at once (sort-tile-recursive loading).
+
+        This is much faster than inserting the shapes one by one and results in
+        a better balanced tree.
+
+        >>> from geometry import Rect
+        >>> index = SpatialIndex.bulk_load([Rect[0:1, i:i + 1] for i in range(100)], 4)
+        >>> len(index)
+        100
+
+        >>> list(index.query(Rect[0:1, 10:12]))
+        [[0:1, 10:11], [0:1, 11:12]]
+        """
+        return cls._bulk_load_entries([(_box(shape), shape) for shape in shapes], capacity)
+
+    @classmethod
+    def _bulk_load_entries(cls, level: List[Any], capacity: int) -> 'SpatialIndex[T]':
+        index = cls(capacity)
+        index._size = len(level)
+        if not level:
+            return index
+
+        is_leaf = True
+        while True:
+            level = _pack(level, capacity, is_leaf)
+            is_leaf = False
+            if len(level) == 1:
+                break
+
+        index._root = level[0]
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _choose_path(self, box: Box) -> List[_Node[T]]:
+        node = self._root
+        path = [node]
+        while not node.is_leaf:
+            node = min(
+                node.children,
+                key=lambda child: (_enlargement(child.box, box), _area(child.box)),
+            )
+            path.append(node)
+        return path
+
+    def _split(self, node: _Node[T]) -> Tuple[_Node[T], _Node[T]]:
+        box = node.box
+        axis = 0 if box[2] - box[0] >= box[3] - box[1] else 1
+
+        def center(child: Any) -> Number:
+            child_box = node._child_box(child)
+            return child_box[axis] + child_box[axis + 2]
+
+        children = sorted(node.children, key=center)
+        half = len(children) // 2
+        return _Node(children[:half], node.is_leaf), _Node(children[half:], node.is_leaf)
+
+    def insert(self, shape: T) -> None:
+        """
+        Insert one shape into the index.
+
+        >>> from geometry import Rect
+        >>> index = SpatialIndex(capacity=2)
+        >>> for i in range(10):
+        ...     index.insert(Rect[i:i + 1, 0:1])
+        >>> list(index.query(Rect[3:5, 0:1]))
+        [[3:4, 0:1], [4:5, 0:1]]
+        """
+        box = _box(shape)
+        if not self._size:
+            self._root = _Node([(box, shape)], is_leaf=True)
+            self._size = 1
+            return
+
+        path = self._choose_path(box)
+        path[-1].children.append((box, shape))
+        self._size += 1
+
+        for node in path:
+            node.box = _merge((node.box, box))
+
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            if len(node.children) <= self.capacity:
+                break
+
+            first, second = self._split(node)
+            if depth == 0:
+                self._root = _Node([first, second], is_leaf=False)
+            else:
+                parent = path[depth - 1]
+                parent.children.remove(node)
+                parent.children.extend((first, second))
+
+    def remove(self, shape: T, old: Optional[Box] = None) -> bool:
+        """
+        Remove a shape from the index. Return ``False`` if it was not found.
+        The shape is compared by identity, not by equality. ``old`` is the box the
+        shape was inserted with, if it has changed since, see :meth:`update`.
+
+        >>> from geometry import Rect
+        >>> shapes = [Rect[i:i + 1, 0:1] for i in range(10)]
+        >>> index = SpatialIndex.bulk_load(shapes, capacity=2)
+        >>> index.remove(shapes[4])
+        True
+        >>> index.remove(Rect[4:5, 0:1])
+        False
+        >>> list(index.query(Rect[3:6, 0:1]))
+        [[3:4, 0:1], [5:6, 0:1]]
+        """
+        box = _box(shape) if old is None else old
+        path = self._find(shape, box) or self._find(shape, None)
+        if path is None:
+            return False
+        self._delete(path, shape)
+        return True
+
+    def update(self, shape: T, old: Optional[Box] = None) -> bool:
+        """
+        Move a shape that has changed to its new box. ``old`` is the box
+        ``[left, bottom, right, top]`` the shape had before, without it the whole index
+        is searched. Return ``False`` if the shape was not found.
+
+        >>> from geometry import Rect
+        >>> r = Rect[0:1, 0:1]
+        >>> index = SpatialIndex.bulk_load([r, Rect[5:6, 5:6]])
+        >>> r.x = 8.5
+        >>> index.update(r, [0, 0, 1, 1])
+        True
+        >>> list(index.query(Rect[0:2, 0:2])), list(index.query(Rect[7:9, 0:2]))
+        ([], [[8:9, 0:1]])
+        """
+        path = self._find(shape, old)
+        if path is None:
+            return False
+        self._delete(path, shape)
+        self.insert(shape)
+        return True
+
+    def _delete(self, path: List[_Node[T]], shape: T) -> None:
+        leaf = path[-1]
+        position = next(i for i, entry in enumerate(leaf.children) if entry[1] is shape)
+        del leaf.children[position]
+        self._size -= 1
+
+        for depth in range(len(path) - 1, 0, -1):
+            node = path[depth]
+            if not node.children:
+                path[depth - 1].children.remove(node)
+            else:
+                node.box = node._children_box()
+
+        root = self._root
+        if root.children:
+            root.box = root._children_box()
+        while not root.is_leaf and len(root.children) == 1:
+            root = root.children[0]
+        self._root = root if root.children else _Node([], is_leaf=True)
+
+    def _find(self, shape: T, box: Optional[Box]) -> Optional[List[_Node[T]]]:
+        # Only nodes that contain the box are searched. The box of the shape may
+        # have changed since it was inserted, in that case search without a box.
+        stack = [[self._root]]
+        while stack:
+            path = stack.pop()
+            node = path[-1]
+            if box is not None and not _contains(node.box, box):
+                continue
+            if node.is_leaf:
+                if any(entry[1] is shape for entry in node.children):
+                    return path
+            else:
+                stack.extend(path + [child] for child in node.children)
+        return None
+
+    def query(self, window: Any, touching: bool = False) -> Generator[T, None, None]:
+        """
+        Yield every shape that overlaps the given window. The window may be any shape
+        with ``left``, ``right``, ``bottom`` and ``top`` edges.
+
+        With ``touching``, shapes that only touch the window are yielded as well.
+
+        >>> from geometry import Rect
+        >>> index = SpatialIndex.bulk_load([Rect[0:1, 0:1], Rect[1:2, 0:1]])
+        >>> list(index.query(Rect[0:1, 0:1], touching=True))
+        [[0:1, 0:1], [1:2, 0:1]]
+        """
+        yield from self._query_box(_box(window), _touches if touching else _overlaps)
+
+    def _query_box(
+        self, box: Box, overlaps: Callable[[Box, Box], bool]
+    ) -> Generator[T, None, None]:
+        if not self._size:
+            return
+
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if not overlaps(node.box, box):
+                continue
+            if node.is_leaf:
+                for child_box, shape in node.children:
+                    if overlaps(child_box, box):
+                        yield shape
+            else:
+                stack.extend(reversed(node.children))
+
+    def shift(self, dx: Number, dy: Number) -> None:
+        """
+        Move every stored box by the given offset. This is used when all shapes in the
+        index are translated together.
+
+        >>> from geometry import Rect
+        >>> index = SpatialIndex.bulk_load([Rect[0:1, 0:1]])
+        >>> index.shift(10, 0)
+        >>> list(index.query(Rect[10:11, 0:1]))
+        [[0:1, 0:1]]
+        """
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            _shift(node.box, dx, dy)
+            if node.is_leaf:
+                for child_box, _ in node.children:
+                    _shift(child_box, dx, dy)
+            else:
+                stack.extend(node.children)
+
+
+def _shift(box: Box, dx: Number, dy: Number) -> None:
+    box[0] += dx
+    box[1] += dy
+    box[2] += dx
+    box[3] += dy
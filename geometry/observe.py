@@ -0,0 +1,294 @@
+from dataclasses import fields, is_dataclass
+from operator import attrgetter
+from typing import Any, Callable, ClassVar, Dict, FrozenSet, Iterable, List, Optional, Sequence
+from typing import Set, Tuple, TypeVar
+from typing import TYPE_CHECKING
+from weakref import ref
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .rect import Rect
+
+
+class Observable:
+    """
+    Mixin for shapes that tell the groups containing them when their geometry changes.
+
+    Assigning ``x``, ``y``, ``width`` or ``height`` (and therefore every edge, corner,
+    stretch or translate operation) invalidates the bounding box of every group
+    the shape was added to. Constructors and private attributes are not affected.
+
+    A shape that is not part of any group is not watched, assigning its attributes
+    stores them directly. Once a group adds or borrows the shape, its class is
+    replaced with a subclass whose attributes listed in ``_notifying`` are
+    :class:`Notifying` descriptors. The subclass has the same name and compares equal
+    like the original class, copies and pickles get the original class back.
+
+    >>> from geometry import Group, Rect
+    >>> r = Rect[0:1, 0:1]
+    >>> g = Group([r])
+    >>> 'x' in type(r).__dict__, isinstance(r, Rect), r == Rect[0:1, 0:1]
+    (True, True, True)
+    >>> type(r.copy()) is Rect
+    True
+    >>> g.remove(r)
+    >>> type(r) is Rect
+    True
+
+    Copies of groups borrow the shapes of the original instead of copying them.
+    Assigning a notifying attribute first gives every borrowing group a copy of the
+    shape, so that only the groups the shape really belongs to see the change.
+    Nested groups borrowed by a copy are handled by asking the parents first.
+
+    Parents are referenced weakly as well, groups that are thrown away do not stay
+    attached to the shapes they contained. Dead references are dropped from time to time.
+
+    >>> r = Rect[0:1, 0:1]
+    >>> for _ in range(1000):
+    ...     _ = Group([r])
+    >>> len(r._parents) < 10
+    True
+    """
+
+    # empty slots allow slotted shapes, see geometry.compact
+    __slots__ = ()
+
+    _parents: Sequence['ref[Observer]'] = ()
+    _borrowers: Sequence['ref[Observer]'] = ()
+
+    # the attributes that notify while the shape is watched, True if they are part of
+    # the geometry, collected from all base classes
+    _notifying: ClassVar[Dict[str, bool]] = {}
+
+    if TYPE_CHECKING:  # pragma: no cover
+        # the empty slots are for slotted subclasses, all others have an instance dictionary
+        def __setattr__(self, key: str, value: Any) -> None:
+            pass
+
+    def _will_change(self) -> None:
+        for reference in self._parents:
+            parent = reference()
+            if parent is not None:
+                parent._before_change(self)
+        if not self._borrowers:
+            return
+        borrowers, self._borrowers = self._borrowers, ()
+        for reference in borrowers:
+            borrower = reference()
+            if borrower is not None:
+                borrower._own(self)
+        self._unwatch()
+
+    def _watch(self) -> None:
+        watched = _watched_class(type(self))
+        if watched is not type(self):
+            self.__class__ = watched
+
+    def _unwatch(self) -> None:
+        free = _free.get(type(self))
+        if free is not None and not self._parents and not self._borrowers:
+            self.__class__ = free
+
+    def _assign(self, **values: Any) -> None:
+        # assign several attributes with a single notification, e.g. for a transform
+        notified = _notified.get(type(self))
+        if notified is None or not notified.issuperset(values):
+            for name, value in values.items():
+                setattr(self, name, value)
+            return
+        self._will_change()
+        self.__dict__.update(values)
+        self._changed()
+
+    def _lend(self, borrower: 'Observer') -> None:
+        # Borrowers are referenced weakly, copies that are thrown away must not be kept
+        # alive by the shapes they borrowed. Dead references are dropped from time to time.
+        if not self._borrowers:
+            self._borrowers = []
+        _append(self._borrowers, borrower)
+        self._watch()
+
+    def _take_back(self, borrower: 'Observer') -> None:
+        self._borrowers = [known for known in self._borrowers if known() is not borrower]
+        self._unwatch()
+
+    def _changed(self) -> None:
+        for reference in self._parents:
+            parent = reference()
+            if parent is not None:
+                parent._invalidate(self)
+
+    def _attach(self, parent: 'Observer') -> None:
+        if not self._parents:
+            self._parents = []
+        if not any(known() is parent for known in self._parents):
+            _append(self._parents, parent)
+        self._watch()
+
+    def _detach(self, parent: 'Observer') -> None:
+        self._parents = [
+            known for known in self._parents if known() is not parent and known() is not None
+        ]
+        self._unwatch()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # copies of a shape are not part of the groups of the original
+        state = self.__dict__.copy()
+        state.pop('_parents', None)
+        state.pop('_borrowers', None)
+        return state
+
+
+class Notifying:
+    """
+    Descriptor for a public attribute of a watched :class:`Observable` that is stored
+    in the instance dictionary. Only assigning goes through the descriptor, reading the
+    attribute is a plain dictionary lookup.
+
+    Assigning first gives the borrowing groups their own copy of the shape. The bounding
+    boxes of the parents are invalidated if the attribute is part of the geometry.
+    """
+
+    __slots__ = ('name', 'geometry')
+
+    def __init__(self, name: str, geometry: bool = True) -> None:
+        self.name = name
+        self.geometry = geometry
+
+    def __set__(self, instance: Observable, value: Any) -> None:
+        # only watched shapes have these descriptors, see Observable
+        instance._will_change()
+        instance.__dict__[self.name] = value
+        if self.geometry:
+            instance._changed()
+
+
+# the watched subclass of every shape class, and the other way round
+_watched: Dict[type, type] = {}
+_free: Dict[type, type] = {}
+# the names of the notifying attributes of every watched class
+_notified: Dict[type, FrozenSet[str]] = {}
+# the watched classes that keep their position in the instance dictionary
+_positioned: Set[type] = set()
+
+
+def _watched_class(cls: type) -> type:
+    watched = _watched.get(cls)
+    if watched is not None:
+        return watched
+
+    notifying: Dict[str, bool] = {}
+    for base in reversed(cls.__mro__):
+        notifying.update(base.__dict__.get('_notifying', {}))
+    # attributes that are descriptors already, like properties, notify by themselves
+    namespace: Dict[str, Any] = {
+        name: Notifying(name, geometry)
+        for name, geometry in notifying.items()
+        if not hasattr(getattr(cls, name, None), '__set__')
+    }
+    if not namespace:
+        _watched[cls] = cls
+        return cls
+
+    names = frozenset(namespace)
+    namespace.update(
+        __slots__=(),
+        __module__=cls.__module__,
+        __qualname__=cls.__qualname__,
+        __reduce_ex__=_reduce_ex,
+    )
+    if is_dataclass(cls):
+        compared = attrgetter(*(field.name for field in fields(cls) if field.compare))
+        namespace.update(__eq__=_equal(cls, compared), __hash__=cls.__hash__)
+
+    watched = type(cls.__name__, (cls,), namespace)
+    _watched[cls] = _watched[watched] = watched
+    _free[watched] = cls
+    _notified[watched] = names
+    if names.issuperset(('x', 'y')):
+        _positioned.add(watched)
+    return watched
+
+
+def _equal(cls: type, compared: Callable[[Any], Any]) -> Callable[[Any, Any], Any]:
+    # a watched shape is equal to a shape of the original class and the other way round
+    def __eq__(self: Any, other: Any) -> Any:
+        if _free.get(type(other), type(other)) is not cls:
+            return NotImplemented
+        return compared(self) == compared(other)
+
+    return __eq__
+
+
+def _reduce_ex(self: Any, protocol: int) -> Tuple[Any, ...]:
+    # copies and pickles are not part of any group, they get the original class
+    return _new, (_free[type(self)],), self.__getstate__()
+
+
+def _new(cls: type) -> Any:
+    return object.__new__(cls)
+
+
+Shifted = TypeVar('Shifted', bound=Observable)
+
+
+def _shift(shapes: Iterable[Shifted], dx: Any, dy: Any) -> List[Shifted]:
+    # Moves the watched shapes that belong to a single group without telling that group,
+    # which moves its own bounding box as a whole. Returns the shapes that must be told.
+    told = []
+    for shape in shapes:
+        if type(shape) in _positioned and len(shape._parents) == 1 and not shape._borrowers:
+            coordinates = shape.__dict__
+            coordinates['x'] += dx
+            coordinates['y'] += dy
+        else:
+            told.append(shape)
+    return told
+
+
+def _append(references: Sequence['ref[Observer]'], observer: 'Observer') -> None:
+    # dead references are dropped whenever the list reaches a power of two
+    size = len(references)
+    known: List['ref[Observer]'] = references  # type: ignore
+    if size >= 8 and not size & (size - 1):
+        known[:] = [reference for reference in known if reference() is not None]
+    known.append(ref(observer))
+
+
+class Observer(Observable):
+    """
+    Mixin for groups that recompute their bounding box lazily.
+
+    A change of a contained shape only marks the bounding box as dirty and remembers
+    the changed shape as stale. The dirty flag is passed on to the parent groups, which
+    is cheap because it stops at groups that are already dirty. The bounding box is
+    recomputed on the next access.
+    """
+
+    _bbox: Optional['Rect'] = None
+    _dirty = False
+    _stale: Optional[Dict[int, Observable]] = None
+
+    def _local_bbox(self) -> Optional['Rect']:
+        if self._dirty:
+            self._bbox = self._compute_bbox()
+            self._dirty = False
+        return self._bbox
+
+    def _compute_bbox(self) -> Optional['Rect']:
+        raise NotImplementedError  # pragma: no cover
+
+    def _own(self, child: Observable) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    def _before_change(self, child: Observable) -> None:
+        # a contained shape is about to change
+        self._will_change()
+
+    def _invalidate(self, child: Optional[Observable] = None) -> None:
+        if child is not None:
+            if self._stale is None:
+                self._stale = {}
+            self._stale[id(child)] = child
+        if not self._dirty:
+            self._dirty = True
+            self._changed()
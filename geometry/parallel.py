@@ -0,0 +1,390 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from math import ceil
+from sys import version_info
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .point import Number
+from .rect import Rect
+from .compact import CompactRect
+from .index import SpatialIndex, _box, _touches
+from .sweep import Edges, _merged_edges, merge, overlapping_pairs
+from .density import density
+from .drc import Rule, Violation, check
+from .shared import ShapeTable
+
+Operation = Callable[['Tile'], Any]
+
+
+@dataclass
+class Tile:
+    """
+    A part of the layout that is processed by one worker.
+
+    The tile is responsible for its ``core``. ``ids`` are the positions of all shapes
+    in the ``table`` that overlap or touch the ``window``, i.e. the core grown by the
+    halo, so that results can refer to the original shapes. ``bounds`` is the area
+    that is covered by all tiles together.
+    """
+
+    core: Rect
+    window: Rect
+    bounds: Rect
+    table: ShapeTable
+    ids: 'array[int]'
+    _shapes: Optional[List[CompactRect]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def shapes(self) -> List[CompactRect]:
+        """
+        Plain copies of the shapes of this tile, created from the table when they
+        are first used
+        """
+        if self._shapes is None:
+            self._shapes = self.table.rects(self.ids)
+        return self._shapes
+
+    def owns(self, x: Number, y: Number) -> bool:
+        """
+        True if the point belongs to this tile. A tile owns its left and bottom edge,
+        and its right and top edge only at the border of the bounds, so every point in
+        the bounds belongs to exactly one tile. Results that are found by several tiles
+        are kept by the tile that owns their bottom left corner.
+
+        >>> core, window, bounds = Rect[0:2, 0:2], Rect[-1:3, -1:3], Rect[0:4, 0:2]
+        >>> tile = Tile(core, window, bounds, ShapeTable([]), array('i'))
+        >>> tile.owns(0, 0), tile.owns(2, 0), tile.owns(1, 2)
+        (True, False, True)
+        """
+        core, bounds = self.core, self.bounds
+        return (core.left <= x < core.right or x == core.right == bounds.right) and (
+            core.bottom <= y < core.top or y == core.top == bounds.top
+        )
+
+
+def _edges(rect: Any) -> Edges:
+    return rect.left, rect.right, rect.bottom, rect.top
+
+
+def _steps(start: Number, stop: Number, step: Number) -> List[Tuple[Number, Number]]:
+    # the last tile ends exactly at the border, even if the step does not divide it
+    count = max(ceil((stop - start) / step), 1)
+    borders = [start + i * step for i in range(count)] + [stop]
+    return list(zip(borders, borders[1:]))
+
+
+class TileExecutor:
+    """
+    Runs an operation on the tiles of a layout in a pool of processes.
+
+    The bounding box of the shapes is cut into tiles of the given size. Every tile gets
+    the shapes that reach into its core or its halo, and the operation is called once
+    per tile in a :class:`~concurrent.futures.ProcessPoolExecutor`. The operation must
+    be picklable, e.g. a function on module level or one of the built-in operations
+    :class:`Overlaps`, :class:`Merge`, :class:`Density` and :class:`Check`.
+
+    An operation is called with a :class:`Tile`. It may have a ``halo``, which is added
+    to the halo of the executor, a ``bounds`` rect that replaces the bounding box and a
+    ``stitch(results, shapes)`` method that joins the results of all tiles. Without
+    ``stitch``, the results must be lists and they are concatenated.
+
+    >>> from geometry import Group
+    >>> def widths(tile):
+    ...     return [shape.width for shape in tile.shapes if tile.owns(shape.left, shape.bottom)]
+    >>> g = Group([Rect[0:1, 0:1], Rect[3:5, 0:1], Rect[0:3, 3:6]])
+    >>> sorted(TileExecutor(2, 2, max_workers=1).run(g, widths))
+    [1.0, 2.0, 3.0]
+
+    The copies in the tiles have float coordinates. With ``max_workers=1`` everything
+    runs in this process, which is useful for debugging.
+    """
+
+    def __init__(
+        self,
+        tile_width: Number,
+        tile_height: Number,
+        halo: Number = 0,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        assert tile_width > 0 and tile_height > 0, "tiles must not be empty"
+        assert halo >= 0, "the halo must not be negative"
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.halo = halo
+        self.max_workers = max_workers
+
+    def tiles(
+        self,
+        shapes: Sequence[Any],
+        halo: Number = 0,
+        bounds: Optional[Rect] = None,
+        table: Optional[ShapeTable] = None,
+    ) -> List[Tile]:
+        """
+        Cut the shapes into tiles, without running anything. The tiles refer to a
+        :class:`ShapeTable` of the shapes, which is created if it is not given.
+
+        >>> executor = TileExecutor(2, 4, halo=1)
+        >>> tiles = executor.tiles([Rect[0:1, 0:4], Rect[4:5, 0:1]])
+        >>> [(tile.core, list(tile.ids)) for tile in tiles]
+        [([0:2, 0:4], [0]), ([2:4, 0:4], [0, 1]), ([4:5, 0:4], [1])]
+        """
+        halo = max(self.halo, halo)
+        boxes = [_box(shape) for shape in shapes]
+        if bounds is None:
+            if not boxes:
+                return []
+            bounds = Rect.from_edges(
+                min(box[0] for box in boxes),
+                max(box[2] for box in boxes),
+                min(box[1] for box in boxes),
+                max(box[3] for box in boxes),
+            )
+        if table is None:
+            table = ShapeTable(shapes)
+        index: SpatialIndex[int] = SpatialIndex._bulk_load_entries(
+            [(box, i) for i, box in enumerate(boxes)], 16
+        )
+
+        tiles = []
+        for bottom, top in _steps(bounds.bottom, bounds.top, self.tile_height):
+            for left, right in _steps(bounds.left, bounds.right, self.tile_width):
+                window = [left - halo, bottom - halo, right + halo, top + halo]
+                tiles.append(
+                    Tile(
+                        Rect.from_edges(left, right, bottom, top),
+                        Rect.from_edges(window[0], window[2], window[1], window[3]),
+                        bounds,
+                        table,
+                        array('i', sorted(index._query_box(window, _touches))),
+                    )
+                )
+        return tiles
+
+    def run(self, shapes: Any, operation: Operation) -> Any:
+        """
+        Run the operation on every tile and stitch the results.
+        ``shapes`` is a group, an array or any iterable of rects and segments.
+
+        The shapes are put into a shared :class:`ShapeTable` once, so the workers
+        only receive the bounds of their tiles and the positions of their shapes.
+        Before Python 3.8 there is no shared memory, and every worker receives a copy
+        of the table instead.
+        """
+        originals = list(shapes.views()) if hasattr(shapes, 'views') else list(shapes)
+        halo = getattr(operation, 'halo', 0)
+        bounds = getattr(operation, 'bounds', None)
+        if self.max_workers == 1:
+            results = [operation(tile) for tile in self.tiles(originals, halo, bounds)]
+        else:
+            with ShapeTable(originals, shared=version_info >= (3, 8)) as table:
+                tiles = self.tiles(originals, halo, bounds, table)
+                with ProcessPoolExecutor(self.max_workers) as pool:
+                    results = list(pool.map(operation, tiles))
+
+        stitch = getattr(operation, 'stitch', None)
+        if stitch is None:
+            return [item for result in results for item in result]
+        return stitch(results, originals)
+
+
+@dataclass(frozen=True)
+class Overlaps:
+    """
+    Every pair of overlapping shapes with their intersection, like :meth:`Group.overlaps`.
+
+    >>> from geometry import Group
+    >>> g = Group([Rect[0:3, 0:2], Group([Rect[2:5, 1:3], Rect[5:6, 5:6]])])
+    >>> TileExecutor(2, 2, max_workers=1).run(g, Overlaps())
+    [([0:3, 0:2], [2:5, 1:3], [2:3, 1:2])]
+    """
+
+    def __call__(self, tile: Tile) -> List[Tuple[int, int, Edges]]:
+        positions = {id(shape): i for i, shape in zip(tile.ids, tile.shapes)}
+        return [
+            (positions[id(first)], positions[id(second)], _edges(intersection))
+            for first, second, intersection in overlapping_pairs(tile.shapes)
+            if tile.owns(intersection.left, intersection.bottom)
+        ]
+
+    def stitch(
+        self, results: List[List[Tuple[int, int, Edges]]], shapes: List[Any]
+    ) -> List[Tuple[Any, Any, Rect]]:
+        return [
+            (shapes[first], shapes[second], Rect.from_edges(*edges))
+            for result in results
+            for first, second, edges in result
+        ]
+
+
+@dataclass(frozen=True)
+class Merge:
+    """
+    Merge the shapes of every layer, like :meth:`Group.merged`.
+
+    Every tile merges the shapes inside of its core. Pieces that touch the border of
+    a core are merged once more when the results are stitched, so shapes that cross
+    tiles are joined again.
+
+    >>> from geometry import Group
+    >>> g = Group([Rect[0:3, 0:1, 'metal'], Rect[2:5, 0:1, 'metal'], Rect[0:1, 0:1, 'via']])
+    >>> TileExecutor(2, 2, max_workers=1).run(g, Merge())
+    [[0:1, 0:1] 'via', [0:5, 0:1] 'metal']
+    """
+
+    def __call__(self, tile: Tile) -> Tuple[List[Rect], List[Rect]]:
+        core = tile.core
+        left, right, bottom, top = core.left, core.right, core.bottom, core.top
+        layers: Dict[Any, List[Edges]] = {}
+        for shape in tile.shapes:
+            clipped = (
+                max(shape.left, left),
+                min(shape.right, right),
+                max(shape.bottom, bottom),
+                min(shape.top, top),
+            )
+            if clipped[0] < clipped[1] and clipped[2] < clipped[3]:
+                layers.setdefault(shape.user_data, []).append(clipped)
+
+        # pieces at the border of the bounds cannot be joined with another tile
+        bounds = tile.bounds
+        borders = (
+            left if left != bounds.left else None,
+            right if right != bounds.right else None,
+            bottom if bottom != bounds.bottom else None,
+            top if top != bounds.top else None,
+        )
+        inner: List[Rect] = []
+        border: List[Rect] = []
+        for layer, edges in layers.items():
+            for piece in _merged_edges(edges):
+                touches = any(edge == limit for edge, limit in zip(piece, borders))
+                (border if touches else inner).append(Rect.from_edges(*piece, layer))
+        return inner, border
+
+    def stitch(self, results: List[Tuple[List[Rect], List[Rect]]], shapes: List[Any]) -> List[Rect]:
+        merged = [rect for inner, _ in results for rect in inner]
+        layers: Dict[Any, List[Rect]] = {}
+        for _, border in results:
+            for rect in border:
+                layers.setdefault(rect.user_data, []).append(rect)
+        for layer, pieces in layers.items():
+            merged.extend(merge(pieces, layer))
+        return merged
+
+
+@dataclass(frozen=True)
+class Density:
+    """
+    The covered share of every tile of a grid, like :func:`geometry.density.density`.
+
+    The tiles of the executor are cut at the window and must be a multiple of
+    the density tiles, so that every density tile is computed by one worker.
+
+    >>> shapes = [Rect[0:3, 0:1], Rect[0:1, 0:2], Rect[3:4, 3:4]]
+    >>> TileExecutor(2, 4, max_workers=1).run(shapes, Density(Rect[0:4, 0:4], 2, 2))
+    array('d', [0.75, 0.25, 0.0, 0.25])
+    """
+
+    bounds: Rect
+    tile_width: Number
+    tile_height: Number
+
+    def __call__(self, tile: Tile) -> Tuple[int, int, int, 'array[float]']:
+        core, bounds = tile.core, tile.bounds
+        column, rest_x = divmod(core.left - bounds.left, self.tile_width)
+        row, rest_y = divmod(core.bottom - bounds.bottom, self.tile_height)
+        assert rest_x == 0 and rest_y == 0, "tiles must be a multiple of the density tiles"
+        columns = ceil(core.width / self.tile_width)
+        covered = density(tile.shapes, core, self.tile_width, self.tile_height)
+        return int(column), int(row), columns, covered
+
+    def stitch(
+        self, results: List[Tuple[int, int, int, 'array[float]']], shapes: List[Any]
+    ) -> 'array[float]':
+        columns = ceil(self.bounds.width / self.tile_width)
+        rows = ceil(self.bounds.height / self.tile_height)
+        covered = array('d', [0.0]) * (columns * rows)
+        for column, row, width, values in results:
+            for offset in range(0, len(values), width):
+                start = (row + offset // width) * columns + column
+                stop, end = start + width, offset + width
+                covered[start:stop] = values[offset:end]
+        return covered
+
+
+ViolationResult = Tuple[int, Edges, List[int], bool]
+
+
+@dataclass(frozen=True)
+class Check:
+    """
+    Check design rules, like :func:`geometry.drc.check`.
+
+    The halo is the largest distance of the rules, so pairs of shapes that violate a
+    rule are always in the same tile. Violations that are found by several tiles are
+    kept once, and violations that may depend on shapes outside of the halo, like an
+    :class:`~geometry.drc.Enclosure` of a long shape, are checked again in the end.
+
+    >>> from geometry.drc import MinSpacing, Enclosure
+    >>> shapes = [Rect[0:10, 0:2, 'metal'], Rect[0:10, 3:4, 'metal'], Rect[9:11, 0:1, 'via']]
+    >>> rules = [MinSpacing('metal', 2), Enclosure('via', 'metal')]
+    >>> for violation in TileExecutor(4, 4, max_workers=1).run(shapes, Check(rules)):
+    ...     print(violation.rule, violation.marker)
+    MinSpacing(layer='metal', minimum=2) [0:10, 2:3]
+    Enclosure(inner='via', outer='metal', margin=0) [10:11, 0:1]
+    """
+
+    rules: Tuple[Rule, ...]
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        object.__setattr__(self, 'rules', tuple(rules))
+
+    @property
+    def halo(self) -> Number:
+        return max((rule.halo for rule in self.rules if rule.halo is not None), default=0)
+
+    def __call__(self, tile: Tile) -> List[ViolationResult]:
+        positions = {id(shape): i for i, shape in zip(tile.ids, tile.shapes)}
+        numbers = {id(rule): i for i, rule in enumerate(self.rules)}
+        window = tile.window
+
+        results = []
+        for violation in check(tile.shapes, self.rules):
+            rule, marker = violation.rule, violation.marker
+            # violations of single shapes belong to the tile of the shape
+            anchor = marker if rule.halo is not None else violation.shapes[0]
+            if not tile.owns(anchor.left, anchor.bottom):
+                continue
+            outside = not (
+                window.left <= marker.left
+                and marker.right <= window.right
+                and window.bottom <= marker.bottom
+                and marker.top <= window.top
+            )
+            ids = [positions[id(shape)] for shape in violation.shapes]
+            results.append((numbers[id(rule)], _edges(marker), ids, outside))
+        return results
+
+    def stitch(self, results: List[List[ViolationResult]], shapes: List[Any]) -> List[Violation]:
+        index: Optional[SpatialIndex[Any]] = None
+
+        def context(window: Rect, layer: Any) -> List[Any]:
+            nonlocal index
+            if index is None:
+                index = SpatialIndex.bulk_load(shapes)
+            return [shape for shape in index.query(window) if shape.user_data == layer]
+
+        violations = []
+        for rule, edges, ids, outside in (item for result in results for item in result):
+            violation: Optional[Violation] = Violation(
+                self.rules[rule], Rect.from_edges(*edges), tuple(shapes[i] for i in ids)
+            )
+            if outside:
+                violation = self.rules[rule].recheck(violation, context)  # type: ignore
+            if violation is not None:
+                violations.append(violation)
+        return violations
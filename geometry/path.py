@@ -1,10 +1,11 @@
 from enum import Enum
-from typing import Any, Optional, cast, TypeVar
+from typing import Any, Optional, Tuple, cast, TypeVar
 from dataclasses import dataclass
 
 from .rect import Rect, BaseRect
 from .point import Point, Number
 from .userdata import HasUserData
+from .transform import Transform
 
 
 class Direction(Enum):
@@ -55,13 +56,46 @@ class Direction(Enum):
         return (self.vector or Point(0, 0)) * other
 
 
+def _direction_of(vector: Point) -> Direction:
+    return next(direction for direction in Direction if (direction * 1) @ vector > 0)
+
+
 Self = TypeVar('Self', bound='BaseSegment')
 
 
+def _start_end(
+    start: Point, end: Point, thickness: Number
+) -> Tuple[Number, Number, Number, Number, Direction]:
+    # the center, size and direction of a segment from start to end
+    center = (end + start) / 2
+    if start.x == end.x:
+        direction = Direction.up if end.y > start.y else Direction.down
+        width = thickness
+        height = abs(end - start)
+    elif start.y == end.y:
+        direction = Direction.right if end.x > start.x else Direction.left
+        width = abs(end - start)
+        height = thickness
+    else:
+        raise ValueError("Segment must be parallel to one of the coordinate axes")
+    return center.x, center.y, width, height, direction
+
+
 @dataclass
 class BaseSegment(BaseRect):
+    __slots__ = ()
+
     direction: Direction
 
+    _notifying = {'direction': False}
+
+    def _apply(self, transform: Transform) -> None:
+        x, y, width, height = transform.rect(self.x, self.y, self.width, self.height)
+        direction = self.direction
+        if not transform.is_translation:
+            direction = _direction_of(transform.vector(direction * 1))
+        self._assign(x=x, y=y, width=width, height=height, direction=direction)
+
     # Properties
 
     @property
@@ -156,6 +190,26 @@ class Segment(HasUserData, BaseSegment):
     [-5:5, -10:10] (up)
     """
 
+    def __init__(
+        self,
+        x: Number,
+        y: Number,
+        width: Number,
+        height: Number,
+        direction: Direction,
+        user_data: Any = None,
+    ) -> None:
+        # bypasses the notifying attributes like Rect.__init__
+        assert width >= 0, "width must be positive"
+        assert height >= 0, "height must be positive"
+        fields = self.__dict__
+        fields['x'] = x
+        fields['y'] = y
+        fields['width'] = width
+        fields['height'] = height
+        fields['direction'] = direction
+        fields['user_data'] = user_data
+
     @classmethod
     def from_rect(cls, rect: Rect, direction: Direction) -> 'Segment':
         """
@@ -184,19 +238,7 @@ class Segment(HasUserData, BaseSegment):
          ...
         ValueError: Segment must be parallel to one of the coordinate axes
         """
-        center = (end + start) / 2
-        if start.x == end.x:
-            direction = Direction.up if end.y > start.y else Direction.down
-            width = thickness
-            height = abs(end - start)
-        elif start.y == end.y:
-            direction = Direction.right if end.x > start.x else Direction.left
-            width = abs(end - start)
-            height = thickness
-        else:
-            raise ValueError("Segment must be parallel to one of the coordinate axes")
-
-        return Segment(center.x, center.y, width, height, direction, user_data)
+        return Segment(*_start_end(start, end, thickness), user_data)
 
     @property
     def rect(self) -> Rect:
@@ -0,0 +1,304 @@
+from itertools import repeat
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
+
+from .point import Point, Number
+from .rect import BaseRect
+from .translate import CanTranslate, _split_key
+from .handles import StretchHandle, TranslateHandle, EdgeHandle, PointHandle
+from .rectarray import RectArray, _column
+
+R = TypeVar('R', bound=BaseRect)
+T = TypeVar('T', bound=CanTranslate)
+
+_STRETCH_EDGES = ('left', 'right', 'bottom', 'top')
+
+# name -> (is horizontal, position of the edge relative to the center in sizes)
+_EDGES = {
+    'x': (True, 0.0),
+    'left': (True, -0.5),
+    'right': (True, 0.5),
+    'y': (False, 0.0),
+    'bottom': (False, -0.5),
+    'top': (False, 0.5),
+}
+
+# a translation step: horizontal, factor, source horizontal (None for constants),
+# source factor, value
+TranslateStep = Tuple[bool, float, Optional[bool], float, Number]
+StretchStep = Tuple[Callable[[Any, Number], None], Optional[Callable[[Any], Number]], Number]
+
+
+def _uses_center_and_size(cls: type) -> bool:
+    return all(
+        getattr(cls, f'_stretch_{edge}') is getattr(BaseRect, f'_stretch_{edge}')
+        for edge in _STRETCH_EDGES
+    )
+
+
+class StretchPlan:
+    """
+    A stretch that is prepared once and applied to many rects.
+
+    It takes the same arguments as :meth:`Rect.stretch`, but the handles and keywords
+    are resolved when the plan is created, instead of every time it is applied.
+
+    >>> from geometry import Rect, out, left
+    >>> plan = StretchPlan(out + 1)
+    >>> plan.apply(Rect[0:2, 0:2])
+    [-1:3, -1:3]
+
+    >>> rects = [Rect[0:2, 0:2], Rect[4:6, 0:2]]
+    >>> StretchPlan(left - 1, top=5).apply_many(rects)
+    >>> rects
+    [[1:2, 0:5], [5:6, 0:5]]
+
+    Absolute positions are applied after relative offsets, like in :meth:`Rect.stretch`
+
+    >>> StretchPlan(left + 1, bottom_left=Point(-1, -2)).apply(Rect[0:2, 0:2])
+    [-1:2, -2:2]
+    """
+
+    def __init__(self, *relative: StretchHandle, **absolute: Union[Number, Point]) -> None:
+        offsets: Dict[str, Number] = {}
+        targets: Dict[str, Number] = {}
+
+        for handles in relative:
+            for handle in handles:
+                offsets[handle.name] = offsets.get(handle.name, 0) + handle.offset
+
+        for key, target in absolute.items():
+            names = _split_key(key)
+            values = (target.x, target.y) if isinstance(target, Point) else (target,)
+            for name, value in zip(names, values):
+                assert name in _STRETCH_EDGES, f"cannot stretch {name}"
+                offsets.pop(name, None)
+                targets[name] = value
+
+        self._offsets = tuple(offsets.get(edge, 0) for edge in _STRETCH_EDGES)
+        self._targets = tuple(targets.get(edge) for edge in _STRETCH_EDGES)
+        self._horizontal = any(edge in offsets or edge in targets for edge in ('left', 'right'))
+        self._vertical = any(edge in offsets or edge in targets for edge in ('bottom', 'top'))
+
+        self._steps: List[Tuple[str, Optional[Callable[[Any], Number]], Number]] = []
+        for edge in _STRETCH_EDGES:
+            if edge in targets:
+                self._steps.append((edge, attrgetter(edge), targets[edge]))
+            elif edge in offsets:
+                self._steps.append((edge, None, offsets[edge]))
+        self._compiled: Dict[type, Optional[List[StretchStep]]] = {}
+
+    def _compile(self, cls: type) -> Optional[List[StretchStep]]:
+        # shapes that store their center and size are changed directly, others like
+        # DbuRect through their own stretch methods
+        if _uses_center_and_size(cls):
+            steps = None
+        else:
+            steps = [
+                (getattr(cls, f'_stretch_{name}'), edge, value) for name, edge, value in self._steps
+            ]
+        self._compiled[cls] = steps
+        return steps
+
+    def _apply(self, rect: Any) -> None:
+        dl, dr, db, dt = self._offsets
+        tl, tr, tb, tt = self._targets
+        if self._horizontal:
+            x, w = rect.x, rect.width
+            if tl is not None:
+                dl = tl - (x - w / 2)
+            if tr is not None:
+                dr = tr - (x + w / 2)
+            rect._assign(width=w + dr - dl, x=x + (dl + dr) / 2)
+        if self._vertical:
+            y, h = rect.y, rect.height
+            if tb is not None:
+                db = tb - (y - h / 2)
+            if tt is not None:
+                dt = tt - (y + h / 2)
+            rect._assign(height=h + dt - db, y=y + (db + dt) / 2)
+
+    def apply(self, rect: R) -> R:
+        """
+        Stretch a single rect in place and return it.
+        """
+        cls = rect.__class__
+        steps = self._compiled[cls] if cls in self._compiled else self._compile(cls)
+        if steps is None:
+            self._apply(rect)
+        else:
+            for stretch, edge, value in steps:
+                stretch(rect, value if edge is None else value - edge(rect))
+        return rect
+
+    def _apply_columns(self, rects: RectArray) -> None:
+        dl, dr, db, dt = self._offsets
+        tl, tr, tb, tt = self._targets
+        if self._horizontal:
+            lefts = repeat(dl) if tl is None else (tl - edge for edge in rects.left)
+            rights = repeat(dr) if tr is None else (tr - edge for edge in rects.right)
+            offsets = list(zip(lefts, rights, rects.x, rects.width))
+            rects.width = _column(w + r - lt for lt, r, _, w in offsets)
+            rects.x = _column(x + (lt + r) / 2 for lt, r, x, _ in offsets)
+        if self._vertical:
+            bottoms = repeat(db) if tb is None else (tb - edge for edge in rects.bottom)
+            tops = repeat(dt) if tt is None else (tt - edge for edge in rects.top)
+            offsets = list(zip(bottoms, tops, rects.y, rects.height))
+            rects.height = _column(h + t - b for b, t, _, h in offsets)
+            rects.y = _column(y + (b + t) / 2 for b, t, y, _ in offsets)
+
+    def apply_many(self, rects: Union[Iterable[BaseRect], RectArray]) -> None:
+        """
+        Stretch every given rect in place.
+
+        >>> from geometry import DbuRect, Rect, right
+        >>> rects = [Rect[0:2, 0:2], DbuRect[0:2, 0:2]]
+        >>> StretchPlan(right + 2).apply_many(rects)
+        >>> rects
+        [[0:4, 0:2], [0:4, 0:2]]
+
+        The columns of a :class:`RectArray` are changed all at once
+
+        >>> rects = RectArray.from_rects(rects)
+        >>> StretchPlan(right + 2, bottom=-2).apply_many(rects)
+        >>> rects
+        RectArray([0:6, -2:2], [0:6, -2:2])
+        """
+        if isinstance(rects, RectArray):
+            self._apply_columns(rects)
+            return
+
+        apply = self.apply
+        for rect in rects:
+            apply(rect)
+
+    __call__ = apply
+
+
+class TranslatePlan:
+    """
+    A translation that is prepared once and applied to many shapes.
+
+    It takes the same arguments as :meth:`Rect.translate` and works for every shape
+    that can be translated, including groups.
+
+    >>> from geometry import Rect, Group, right
+    >>> plan = TranslatePlan(bottom_left=Point(0, 0))
+    >>> plan.apply(Rect[2:4, 2:6])
+    [0:2, 0:4]
+
+    Handles refer to the shape at the time the plan is applied
+
+    >>> shapes = [Rect[0:2, 0:2], Group([Rect[0:4, 0:1]])]
+    >>> TranslatePlan(left=right + 1).apply_many(shapes)
+    >>> shapes
+    [[3:5, 0:2], {[5:9, 0:1]} [5:9, 0:1]]
+    """
+
+    def __init__(self, **absolute: Union[Number, Point, TranslateHandle]) -> None:
+        self._steps: List[TranslateStep] = []
+        for key, target in absolute.items():
+            names = _split_key(key)
+            targets: Tuple[Union[Number, EdgeHandle], ...]
+            if isinstance(target, PointHandle):
+                targets = (target.x, target.y)
+            elif isinstance(target, Point):
+                targets = (target.x, target.y)
+            else:
+                targets = (target,)
+
+            for name, value in zip(names, targets):
+                assert name in _EDGES, f"cannot translate {name}"
+                horizontal, factor = _EDGES[name]
+                if isinstance(value, EdgeHandle):
+                    source, source_factor = _EDGES[value.name]
+                    self._steps.append((horizontal, factor, source, source_factor, value.offset))
+                else:
+                    self._steps.append((horizontal, factor, None, 0.0, value))
+
+    def apply(self, shape: T) -> T:
+        """
+        Translate a single shape in place and return it.
+        """
+        for horizontal, factor, source, source_factor, value in self._steps:
+            if source is True:
+                value += shape.x + source_factor * shape.width
+            elif source is False:
+                value += shape.y + source_factor * shape.height
+            if horizontal:
+                shape.x = value - factor * shape.width if factor else value
+            else:
+                shape.y = value - factor * shape.height if factor else value
+        return shape
+
+    def _apply_columns(self, rects: RectArray) -> None:
+        for horizontal, factor, source, source_factor, value in self._steps:
+            targets: Iterable[Number]
+            if source is None:
+                targets = repeat(value)
+            else:
+                centers, sizes = (rects.x, rects.width) if source else (rects.y, rects.height)
+                targets = (value + c + source_factor * s for c, s in zip(centers, sizes))
+            if horizontal:
+                rects.x = _column(t - factor * w for t, w in zip(targets, rects.width))
+            else:
+                rects.y = _column(t - factor * h for t, h in zip(targets, rects.height))
+
+    def apply_many(self, shapes: Union[Iterable[CanTranslate], RectArray]) -> None:
+        """
+        Translate every given shape in place.
+
+        The columns of a :class:`RectArray` are changed all at once
+
+        >>> from geometry import Rect, top
+        >>> rects = RectArray.from_rects([Rect[0:2, 0:2], Rect[4:6, 3:5]])
+        >>> TranslatePlan(bottom=top, left=10).apply_many(rects)
+        >>> rects
+        RectArray([10:12, 2:4], [10:12, 5:7])
+        """
+        if isinstance(shapes, RectArray):
+            self._apply_columns(shapes)
+            return
+
+        apply = self.apply
+        for shape in shapes:
+            apply(shape)
+
+    __call__ = apply
+
+
+def stretch_many(
+    rects: Union[Iterable[BaseRect], RectArray],
+    *relative: StretchHandle,
+    **absolute: Union[Number, Point],
+) -> None:
+    """
+    Stretch many rects in place, with the same arguments as :meth:`Rect.stretch`.
+    The handles are resolved only once, see :class:`StretchPlan`.
+
+    >>> from geometry import Rect, top
+    >>> rects = [Rect[0:2, 0:2], Rect[4:6, 0:3]]
+    >>> stretch_many(rects, top + 1, left=0)
+    >>> rects
+    [[0:2, 0:3], [0:6, 0:4]]
+    """
+    StretchPlan(*relative, **absolute).apply_many(rects)
+
+
+def translate_many(
+    shapes: Union[Iterable[CanTranslate], RectArray],
+    **absolute: Union[Number, Point, TranslateHandle],
+) -> None:
+    """
+    Translate many shapes in place, with the same arguments as :meth:`Rect.translate`.
+    The handles are resolved only once, see :class:`TranslatePlan`.
+
+    Align a row of cells to a rail at y = 10
+
+    >>> from geometry import Rect
+    >>> cells = [Rect[0:2, 3:5], Rect[2:4, -1:3]]
+    >>> translate_many(cells, bottom=10)
+    >>> cells
+    [[0:2, 10:12], [2:4, 10:14]]
+    """
+    TranslatePlan(**absolute).apply_many(shapes)
@@ -1,10 +1,12 @@
 from sys import version_info
-from typing import Tuple, Any, Union, Sequence, TypeVar, Optional
+from typing import Tuple, Any, List, Union, TypeVar, Optional
 from dataclasses import dataclass
 
 from .point import Point, Number
 from .userdata import HasUserData
-from .translate import CanTranslate, int_if_possible as _int
+from .translate import CanTranslate, _split_key, int_if_possible as _int
+from .observe import Observable
+from .transform import Transform
 from .handles import StretchHandle
 
 Range = Union[slice, Number]
@@ -24,12 +26,17 @@ Self = TypeVar('Self', bound='BaseRect')
 
 
 @dataclass
-class BaseRect(CanTranslate):
+class BaseRect(CanTranslate, Observable):
+    __slots__ = ()
+
     x: Number
     y: Number
     width: Number
     height: Number
 
+    # assigning the geometry notifies the groups containing the rect, see Observable
+    _notifying = {'x': True, 'y': True, 'width': True, 'height': True}
+
     def __post_init__(self) -> None:
         assert self.width >= 0, "width must be positive"
         assert self.height >= 0, "height must be positive"
@@ -60,23 +67,23 @@ class BaseRect(CanTranslate):
         """
         return self.width if self.width < self.height else self.height
 
+    def _apply(self, transform: Transform) -> None:
+        x, y, width, height = transform.rect(self.x, self.y, self.width, self.height)
+        self._assign(x=x, y=y, width=width, height=height)
+
     # Stretching
 
     def _stretch_left(self, offset: Number) -> None:
-        self.width -= offset
-        self.x += offset / 2
+        self._assign(width=self.width - offset, x=self.x + offset / 2)
 
     def _stretch_right(self, offset: Number) -> None:
-        self.width += offset
-        self.x += offset / 2
+        self._assign(width=self.width + offset, x=self.x + offset / 2)
 
     def _stretch_bottom(self, offset: Number) -> None:
-        self.height -= offset
-        self.y += offset / 2
+        self._assign(height=self.height - offset, y=self.y + offset / 2)
 
     def _stretch_top(self, offset: Number) -> None:
-        self.height += offset
-        self.y += offset / 2
+        self._assign(height=self.height + offset, y=self.y + offset / 2)
 
     def stretch(self: Self, *relative: StretchHandle, **absolute: Union[Number, Point]) -> Self:
         """
@@ -114,8 +121,8 @@ class BaseRect(CanTranslate):
 
         It is also possible to stretch the corners like this:
 
-        >>> Rect[2:4, 4:6].stretch(bottom_left=Point(0, 0))
-        [0:4, 0:6]
+        >>> Rect[2:4, 4:6].stretch(bottom_left=Point(0, 1))
+        [0:4, 1:6]
 
         >>> from geometry import bottom_left
         >>> Rect[2:4, 4:6].stretch(bottom_left + Point(1, 2))
@@ -144,13 +151,8 @@ class BaseRect(CanTranslate):
                 getattr(self, f'_stretch_{handle.name}')(handle.offset)
 
         for key, target in absolute.items():
-            if isinstance(target, Point):
-                keys: Sequence[str] = key.split('_')
-                targets: Sequence[Number] = (target.x, target.y)
-            else:
-                keys = (key,)
-                targets = (target,)
-
+            keys = _split_key(key)
+            targets = (target.x, target.y) if isinstance(target, Point) else (target,)
             for k, t in zip(keys, targets):
                 offset = t - getattr(self, k)
                 getattr(self, f'_stretch_{k}')(offset)
@@ -240,6 +242,55 @@ class BaseRect(CanTranslate):
 
         return Rect.from_edges(left, right, bottom, top)
 
+    def difference(self, rect: 'BaseRect') -> List['Rect']:
+        """
+        Calculate what is left of this rectangle after cutting out the given rectangle.
+        The rest is returned as up to four disjoint rectangles, which keep the user data.
+
+        ::
+
+            +-------------------+
+            |         3         |
+            +----+---------+----+
+            | 1  |  rect   |  2 |
+            +----+---------+----+
+            |         0         |
+            +-------------------+
+
+        >>> Rect[0:4, 0:4, 'metal'].difference(Rect[1:2, 1:3])
+        [[0:4, 0:1] 'metal', [0:1, 1:3] 'metal', [2:4, 1:3] 'metal', [0:4, 3:4] 'metal']
+
+        >>> Rect[0:4, 0:4].difference(Rect[2:6, -1:5])
+        [[0:2, 0:4]]
+
+        >>> Rect[0:1, 0:1].difference(Rect[1:2, 0:1])
+        [[0:1, 0:1]]
+
+        >>> Rect[0:1, 0:1].difference(Rect[0:2, 0:2])
+        []
+        """
+        user_data = getattr(self, 'user_data', None)
+        left, right, bottom, top = self.left, self.right, self.bottom, self.top
+        inner_left = max(left, rect.left)
+        inner_right = min(right, rect.right)
+        inner_bottom = max(bottom, rect.bottom)
+        inner_top = min(top, rect.top)
+
+        if inner_left >= inner_right or inner_bottom >= inner_top:
+            return [Rect.from_edges(left, right, bottom, top, user_data)]
+
+        pieces = [
+            (left, right, bottom, inner_bottom),
+            (left, inner_left, inner_bottom, inner_top),
+            (inner_right, right, inner_bottom, inner_top),
+            (left, right, inner_top, top),
+        ]
+        return [
+            Rect.from_edges(lt, rt, bt, tp, user_data)
+            for lt, rt, bt, tp in pieces
+            if lt < rt and bt < tp
+        ]
+
     def union(self, rect: 'Rect') -> Optional['Rect']:
         """
         Calculate the union rectangle of this and the given rectangle.
@@ -297,6 +348,19 @@ class Rect(HasUserData, BaseRect):
     (0, -10)
     """
 
+    def __init__(
+        self, x: Number, y: Number, width: Number, height: Number, user_data: Any = None
+    ) -> None:
+        # a new rect has no groups to notify, so the notifying attributes are bypassed
+        assert width >= 0, "width must be positive"
+        assert height >= 0, "height must be positive"
+        fields = self.__dict__
+        fields['x'] = x
+        fields['y'] = y
+        fields['width'] = width
+        fields['height'] = height
+        fields['user_data'] = user_data
+
     @staticmethod
     def from_size(width: Number, height: Number, user: Any = None) -> 'Rect':
         """
@@ -355,8 +419,9 @@ if version_info < (3, 7):  # pragma: no cover
 
     class RectMeta(type):
         def __getitem__(self, init_tuple: InitTuple) -> Rect:
+            # subclasses like DbuRect construct their own class
             # noinspection PyArgumentList
-            return _old_rect_class.__class_getitem__(self, init_tuple)  # type: ignore
+            return self.__class_getitem__(self, init_tuple)  # type: ignore
 
     class Rect(_old_rect_class, metaclass=RectMeta):  # type: ignore
         pass
@@ -0,0 +1,189 @@
+import pickle
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union, TYPE_CHECKING
+
+from .compact import CompactRect
+
+if TYPE_CHECKING:  # pragma: no cover
+    from multiprocessing.shared_memory import SharedMemory
+
+_COLUMNS = ('x', 'y', 'width', 'height')
+
+# tables that are attached in this process, by the name of their shared memory
+_attached: Dict[str, 'ShapeTable'] = {}
+
+
+def _intern(values: Iterable[Any]) -> Tuple[List[Any], 'array[int]']:
+    # every distinct value is stored once, hashable or not
+    table: List[Any] = []
+    known: Dict[Any, int] = {}
+    codes = array('i')
+    for value in values:
+        try:
+            code = known.get(value)
+        except TypeError:
+            code = next((i for i, other in enumerate(table) if other == value), None)
+        if code is None:
+            code = len(table)
+            table.append(value)
+            try:
+                known[value] = code
+            except TypeError:
+                pass
+        codes.append(code)
+    return table, codes
+
+
+def _shared_memory(name: Optional[str] = None, size: int = 0) -> 'SharedMemory':
+    # shared memory needs Python 3.8, it is only imported when it is used
+    from multiprocessing.shared_memory import SharedMemory
+
+    if name is None:
+        return SharedMemory(create=True, size=size)
+    return SharedMemory(name)
+
+
+def _attach(name: str, count: int, table_size: int) -> 'ShapeTable':
+    if name not in _attached:
+        # worker processes share the resource tracker of the process that created the
+        # memory, so it is removed once when that process closes the table
+        _attached[name] = ShapeTable._view(_shared_memory(name), count, table_size)
+    return _attached[name]
+
+
+def _load(data: bytes, count: int, table_size: int) -> 'ShapeTable':
+    return ShapeTable._view(memoryview(bytearray(data)), count, table_size)
+
+
+class ShapeTable:
+    """
+    The center, size and layer of many shapes in flat columns, e.g. to hand them to
+    other processes.
+
+    The ``user_data`` values are interned: every distinct value is stored once in a
+    table and the shapes only keep a number. With ``shared=True`` the columns live in
+    :class:`~multiprocessing.shared_memory.SharedMemory`, and a pickled table is only
+    the name of that memory. Other processes attach to it without copying the columns.
+    The process that created a shared table must :meth:`close` it, or use it as a
+    context manager.
+
+    Shared tables need Python 3.8 or newer. The shared memory module is only imported
+    when a shared table is created, so the package itself still works on older versions.
+
+    >>> from geometry import Rect
+    >>> with ShapeTable([Rect[0:2, 0:2, 'metal'], Rect[4:5, 0:1, 'via']]) as table:
+    ...     print(len(table), table.layers, list(table.codes))
+    2 ['metal', 'via'] [0, 1]
+
+    Unpickling a shared table attaches to its memory, the same way a worker process
+    does. Older versions get a copy of the table instead.
+
+    >>> import pickle, sys
+    >>> shapes = [Rect[0:2, 0:2, 'metal'], Rect[4:5, 0:1, 'via']]
+    >>> with ShapeTable(shapes, shared=sys.version_info >= (3, 8)) as table:
+    ...     attached = pickle.loads(pickle.dumps(table))
+    ...     print(attached.rects([1]))
+    ...     attached.close()
+    [[4:5, 0:1] 'via']
+    """
+
+    x: memoryview
+    y: memoryview
+    width: memoryview
+    height: memoryview
+    codes: memoryview
+    layers: List[Any]
+
+    def __init__(self, shapes: Sequence[Any], shared: bool = False) -> None:
+        layers, codes = _intern(getattr(shape, 'user_data', None) for shape in shapes)
+        table = pickle.dumps(layers)
+        count = len(shapes)
+        size = 8 * len(_COLUMNS) * count + codes.itemsize * count + len(table)
+
+        self._memory: Optional['SharedMemory'] = None
+        self._owner = shared
+        if shared:
+            self._memory = _shared_memory(size=max(size, 1))
+            self._fill(self._memory.buf, count, len(table))
+        else:
+            self._fill(memoryview(bytearray(size)), count, len(table))
+
+        for name in _COLUMNS:
+            getattr(self, name)[:] = array('d', [getattr(shape, name) for shape in shapes])
+        self.codes[:] = codes
+        self._table[:] = table
+        self.layers = layers
+
+    @classmethod
+    def _view(
+        cls, source: Union['SharedMemory', memoryview], count: int, table_size: int
+    ) -> 'ShapeTable':
+        table = cls.__new__(cls)
+        table._memory = None if isinstance(source, memoryview) else source
+        table._owner = False
+        table._fill(source if isinstance(source, memoryview) else source.buf, count, table_size)
+        table.layers = pickle.loads(table._table)
+        return table
+
+    def _fill(self, buffer: Optional[memoryview], count: int, table_size: int) -> None:
+        # the columns are views into the buffer: four float columns, the layer codes
+        # and the pickled layer table
+        assert buffer is not None, "the shared memory is closed"
+        self._count = count
+        self._table_size = table_size
+        self._buffer = buffer
+        start = 0
+        for name in _COLUMNS:
+            stop = start + 8 * count
+            setattr(self, name, buffer[start:stop].cast('d'))
+            start = stop
+        stop = start + array('i').itemsize * count
+        self.codes = buffer[start:stop].cast('i')
+        start, stop = stop, stop + table_size
+        self._table = buffer[start:stop]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def rects(self, ids: Iterable[int]) -> List[CompactRect]:
+        """
+        Create rects for the shapes with the given positions. They have the same
+        size, position and ``user_data``, but the coordinates are floats.
+        """
+        ids = list(ids)
+        x, y, width, height = self.x, self.y, self.width, self.height
+        codes, layers = self.codes, self.layers
+        return CompactRect.from_columns(
+            [x[i] for i in ids],
+            [y[i] for i in ids],
+            [width[i] for i in ids],
+            [height[i] for i in ids],
+            [layers[codes[i]] for i in ids],
+            validate=False,
+        )
+
+    def __reduce__(self) -> Tuple[Any, Tuple[Any, ...]]:
+        if self._memory is not None:
+            return _attach, (self._memory.name, self._count, self._table_size)
+        return _load, (self._buffer.tobytes(), self._count, self._table_size)
+
+    def close(self) -> None:
+        """
+        Release the columns and remove the shared memory, if this table created it.
+        An attached table is forgotten, so unpickling attaches again.
+        """
+        for name in (*_COLUMNS, 'codes', '_table'):
+            getattr(self, name).release()
+        if self._memory is not None:
+            self._memory.close()
+            if self._owner:
+                self._memory.unlink()
+            elif _attached.get(self._memory.name) is self:
+                del _attached[self._memory.name]
+            self._memory = None
+
+    def __enter__(self) -> 'ShapeTable':
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
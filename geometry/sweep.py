@@ -0,0 +1,469 @@
+from bisect import bisect_left, bisect_right, insort
+from heapq import heappush, heappop
+from math import inf
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Sequence, Tuple
+from typing import TypeVar
+
+from .point import Number
+from .rect import Rect
+from .translate import int_if_possible as _int
+from .index import SpatialIndex
+
+S = TypeVar('S')
+
+Row = Tuple[Number, Number, Number, Number, int, Any]
+Edges = Tuple[Number, Number, Number, Number]
+Event = Tuple[Number, int, int, int, int]
+
+_OPERATIONS: Dict[str, Callable[[bool, bool], bool]] = {
+    'and': lambda first, second: first and second,
+    'or': lambda first, second: first or second,
+    'xor': lambda first, second: first != second,
+    'not': lambda first, second: first and not second,
+}
+
+
+def _rows(shapes: Iterable[S]) -> List[Row]:
+    rows = [
+        (shape.left, shape.right, shape.bottom, shape.top, i, shape)  # type: ignore
+        for i, shape in enumerate(shapes)
+    ]
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+
+def overlapping_pairs(shapes: Iterable[S]) -> Generator[Tuple[S, S, Rect], None, None]:
+    """
+    Find every pair of overlapping shapes with a sweep line along the x axis.
+
+    The shapes are visited from left to right. The y ranges of the shapes that are still
+    cut by the sweep line are kept in a segment tree, so every shape is only compared
+    with the shapes it overlaps.
+
+    Yields a tuple of both shapes and their intersection. Shapes that only touch
+    are not reported, the same as in :meth:`Rect.intersection`.
+
+    >>> shapes = [Rect[0:2, 0:2], Rect[1:3, 1:3], Rect[2:4, 0:1], Rect[10:11, 0:1]]
+    >>> for first, second, intersection in overlapping_pairs(shapes):
+    ...     print(first, second, intersection)
+    [0:2, 0:2] [1:3, 1:3] [1:2, 1:2]
+    """
+    rows = _rows(shapes)
+    active = _Active(sorted({y for row in rows for y in (row[2], row[3])}))
+    ends: List[Tuple[Number, int]] = []
+
+    for rank, row in enumerate(rows):
+        left, right, bottom, top, _, shape = row
+
+        while ends and ends[0][0] <= left:
+            other = heappop(ends)[1]
+            active.remove(other, rows[other][2], rows[other][3])
+
+        # shapes without an area never overlap
+        if left >= right or bottom >= top:
+            continue
+
+        for other in active.overlapping(bottom, top):
+            _, other_right, other_bottom, other_top, _, other_shape = rows[other]
+            inner_right = min(right, other_right)
+            inner_bottom = max(bottom, other_bottom)
+            inner_top = min(top, other_top)
+            yield other_shape, shape, Rect.from_edges(left, inner_right, inner_bottom, inner_top)
+
+        active.insert(rank, bottom, top)
+        heappush(ends, (right, rank))
+
+
+class _Active:
+    """
+    The y ranges of the shapes that are cut by the sweep line, so that the shapes that
+    overlap a new range are found without comparing it with all of them.
+
+    A range overlaps ``[bottom, top)`` if it contains ``bottom``, which a segment tree
+    over the y coordinates answers, or if it starts between ``bottom`` and ``top``,
+    which is looked up in the sorted starts.
+    """
+
+    def __init__(self, ys: Sequence[Number]) -> None:
+        self.positions = {y: i for i, y in enumerate(ys)}
+        self.size = len(ys)
+        # the shapes whose range covers each node, by their rank
+        self.nodes: List[Optional[Dict[int, None]]] = [None] * (2 * self.size)
+        self.starts: List[Tuple[Number, int]] = []
+
+    def _nodes(self, bottom: Number, top: Number) -> List[int]:
+        # the nodes that cover the range together
+        found = []
+        low = self.positions[bottom] + self.size
+        high = self.positions[top] + self.size
+        while low < high:
+            if low & 1:
+                found.append(low)
+                low += 1
+            if high & 1:
+                high -= 1
+                found.append(high)
+            low >>= 1
+            high >>= 1
+        return found
+
+    def insert(self, rank: int, bottom: Number, top: Number) -> None:
+        nodes = self.nodes
+        for node in self._nodes(bottom, top):
+            members = nodes[node]
+            if members is None:
+                members = nodes[node] = {}
+            members[rank] = None
+        insort(self.starts, (bottom, rank))
+
+    def remove(self, rank: int, bottom: Number, top: Number) -> None:
+        nodes = self.nodes
+        for node in self._nodes(bottom, top):
+            del nodes[node][rank]  # type: ignore
+        starts = self.starts
+        del starts[bisect_left(starts, (bottom, rank))]
+
+    def overlapping(self, bottom: Number, top: Number) -> List[int]:
+        """
+        The ranks of all shapes whose range overlaps ``[bottom, top)``, in ascending order.
+        """
+        found: List[int] = []
+        nodes = self.nodes
+        node = self.positions[bottom] + self.size
+        while node:
+            members = nodes[node]
+            if members:
+                found.extend(members)
+            node >>= 1
+        # ranges that start at bottom are in the tree already
+        starts = self.starts
+        start = bisect_right(starts, (bottom, inf))
+        stop = bisect_left(starts, (top, -1))
+        found.extend(rank for _, rank in starts[start:stop])
+        found.sort()
+        return found
+
+
+class _Coverage:
+    """
+    A segment tree over the sorted x coordinates, which counts how often each part
+    of the x axis is covered.
+    """
+
+    def __init__(self, xs: Sequence[Number]) -> None:
+        self.xs = xs
+        self.size = max(len(xs) - 1, 1)
+        self.count = [0] * (4 * self.size)
+        self.length: List[Number] = [0] * (4 * self.size)
+        # the least and most coverage below each node, without the nodes above it
+        self.least = [0] * (4 * self.size)
+        self.most = [0] * (4 * self.size)
+
+    @property
+    def covered(self) -> Number:
+        """
+        The total length that is covered at least once
+        """
+        return self.length[1]
+
+    def add(self, start: int, stop: int, delta: int) -> None:
+        """
+        Cover the x coordinates from ``xs[start]`` to ``xs[stop]`` ``delta`` more times
+        """
+        self._update(1, 0, self.size, start, stop, delta)
+
+    def _update(self, node: int, low: int, high: int, start: int, stop: int, delta: int) -> None:
+        if start <= low and high <= stop:
+            self.count[node] += delta
+        else:
+            middle = (low + high) // 2
+            if start < middle:
+                self._update(2 * node, low, middle, start, stop, delta)
+            if middle < stop:
+                self._update(2 * node + 1, middle, high, start, stop, delta)
+
+        count = self.count[node]
+        if high - low == 1:
+            self.least[node] = self.most[node] = count
+            self.length[node] = self.xs[high] - self.xs[low] if count else 0
+            return
+
+        least, most, left, right = self.least, self.most, 2 * node, 2 * node + 1
+        least[node] = count + (least[left] if least[left] < least[right] else least[right])
+        most[node] = count + (most[left] if most[left] > most[right] else most[right])
+        if count:
+            self.length[node] = self.xs[high] - self.xs[low]
+        else:
+            self.length[node] = self.length[left] + self.length[right]
+
+    def runs(self, start: int, stop: int, covered: bool) -> List[Tuple[int, int]]:
+        """
+        The parts from ``xs[start]`` to ``xs[stop]`` that are covered, or not covered,
+        as pairs of positions in ``xs`` from left to right. Touching parts are joined.
+
+        Only the nodes along the borders of the parts are visited.
+        """
+        result: List[Tuple[int, int]] = []
+        stack = [(1, 0, self.size, 0)]
+        while stack:
+            node, low, high, above = stack.pop()
+            if stop <= low or high <= start:
+                continue
+            least, most = above + self.least[node], above + self.most[node]
+            if least > 0 if covered else most == 0:
+                low, high = max(low, start), min(high, stop)
+                if result and result[-1][1] == low:
+                    low = result.pop()[0]
+                result.append((low, high))
+            elif most > 0 if covered else least == 0:
+                middle = (low + high) // 2
+                above += self.count[node]
+                stack.append((2 * node + 1, middle, high, above))
+                stack.append((2 * node, low, middle, above))
+        return result
+
+
+def _edges(shapes: Iterable[Any]) -> List[Edges]:
+    edges = [(shape.left, shape.right, shape.bottom, shape.top) for shape in shapes]
+    return [(lt, rt, bt, tp) for lt, rt, bt, tp in edges if lt < rt and bt < tp]
+
+
+def _events(operands: Sequence[List[Edges]]) -> Tuple[List[Number], List[Event]]:
+    # the sorted x coordinates and the bottom and top edges sorted along the y axis
+    xs = sorted({x for edges in operands for lt, rt, _, _ in edges for x in (lt, rt)})
+    position = {x: i for i, x in enumerate(xs)}
+    events = [
+        (y, delta, operand, position[lt], position[rt])
+        for operand, edges in enumerate(operands)
+        for lt, rt, bt, tp in edges
+        for y, delta in ((bt, 1), (tp, -1))
+    ]
+    events.sort(key=lambda event: event[0])
+    return xs, events
+
+
+class _Open:
+    """
+    The kept parts of the sweep line as disjoint intervals of positions in ``xs``, each
+    with the y coordinate where it started. An interval grows upwards for as long as
+    it stays the same, and becomes a rect when it changes.
+    """
+
+    def __init__(self, xs: Sequence[Number]) -> None:
+        self.xs = xs
+        self.starts: List[int] = []
+        self.intervals: Dict[int, Tuple[int, Number]] = {}
+        self.closing: Dict[Tuple[int, int], Number] = {}
+        self.result: List[Edges] = []
+
+    def _close(self, start: int) -> int:
+        del self.starts[bisect_left(self.starts, start)]
+        stop, bottom = self.intervals.pop(start)
+        key = start, stop
+        self.closing[key] = min(bottom, self.closing.get(key, bottom))
+        return stop
+
+    def _open(self, start: int, stop: int, y: Number) -> None:
+        insort(self.starts, start)
+        self.intervals[start] = stop, y
+
+    def keep(self, start: int, stop: int, y: Number) -> None:
+        # joined with the intervals that end at start or begin at stop
+        position = bisect_left(self.starts, start)
+        if position and self.intervals[self.starts[position - 1]][0] == start:
+            start = self.starts[position - 1]
+            self._close(start)
+        if stop in self.intervals:
+            stop = self._close(stop)
+        self._open(start, stop, y)
+
+    def drop(self, start: int, stop: int, y: Number) -> None:
+        # the dropped part lies inside of one interval
+        outer = self.starts[bisect_right(self.starts, start) - 1]
+        end = self._close(outer)
+        if outer < start:
+            self._open(outer, start, y)
+        if stop < end:
+            self._open(stop, end, y)
+
+    def settle(self, y: Number) -> None:
+        """
+        Finish all changes at ``y``. Intervals that were closed and opened again
+        unchanged keep growing, all others become rects.
+        """
+        xs = self.xs
+        for (start, stop), bottom in self.closing.items():
+            reopened = self.intervals.get(start)
+            if reopened == (stop, y):
+                self.intervals[start] = stop, bottom
+            elif bottom < y:
+                self.result.append((xs[start], xs[stop], bottom, y))
+        self.closing = {}
+
+
+def _sweep(operands: Sequence[List[Edges]], keep: Callable[..., bool]) -> List[Edges]:
+    """
+    Sweep along the y axis over one or two operands and return the area where ``keep``
+    is true for the coverage of the operands, as disjoint rects in the widest possible
+    horizontal strips. Strips of the same width on top of each other are joined.
+
+    A bottom or top edge only changes the coverage of its operand between its ends, and
+    only the parts where that coverage flips between zero and not zero are visited.
+    The kept intervals are extended, split or closed there.
+    """
+    xs, events = _events(operands)
+    coverages = [_Coverage(xs) for _ in operands]
+    kept = _Open(xs)
+
+    previous = events[0][0] if events else 0
+    for y, delta, operand, start, stop in events:
+        if y != previous:
+            kept.settle(previous)
+            previous = y
+        coverage = coverages[operand]
+        if delta > 0:
+            flips = coverage.runs(start, stop, False)
+            coverage.add(start, stop, delta)
+        else:
+            coverage.add(start, stop, delta)
+            flips = coverage.runs(start, stop, False)
+        inside = delta > 0
+        for flip_start, flip_stop in flips:
+            for part_start, part_stop, others in _parts(coverages, operand, flip_start, flip_stop):
+                before = keep(*others[:operand], not inside, *others[operand:])
+                if before == keep(*others[:operand], inside, *others[operand:]):
+                    continue
+                if before:
+                    kept.drop(part_start, part_stop, y)
+                else:
+                    kept.keep(part_start, part_stop, y)
+    kept.settle(previous)
+
+    kept.result.sort(key=lambda edges: (edges[2], edges[0]))
+    return kept.result
+
+
+def _parts(
+    coverages: Sequence[_Coverage], operand: int, start: int, stop: int
+) -> Generator[Tuple[int, int, Tuple[bool, ...]], None, None]:
+    # split the range where the other operand is covered and where it is not
+    if len(coverages) == 1:
+        yield start, stop, ()
+        return
+    position = start
+    for covered_start, covered_stop in coverages[1 - operand].runs(start, stop, True):
+        if position < covered_start:
+            yield position, covered_start, (False,)
+        yield covered_start, covered_stop, (True,)
+        position = covered_stop
+    if position < stop:
+        yield position, stop, (False,)
+
+
+def area(shapes: Iterable[Any]) -> Number:
+    """
+    Calculate the area covered by the shapes. Overlaps are counted only once.
+
+    The covered length of the sweep line is kept up to date in a segment tree, so this
+    takes O(n log n) time for n shapes.
+
+    >>> area([Rect[0:2, 0:2], Rect[1:3, 1:3]])
+    7
+
+    >>> area([Rect[0:4, 0:4], Rect[1:2, 1:2]])
+    16
+    """
+    xs, events = _events([_edges(shapes)])
+    coverage = _Coverage(xs)
+    total: Number = 0
+    previous: Number = 0
+    for y, delta, _, start, stop in events:
+        total += coverage.covered * (y - previous)
+        coverage.add(start, stop, delta)
+        previous = y
+    return _int(total)  # type: ignore
+
+
+def _merged_edges(edges: List[Edges]) -> List[Edges]:
+    return _sweep([edges], bool)
+
+
+def merge(shapes: Iterable[Any], user_data: Any = None) -> List[Rect]:
+    """
+    Merge overlapping and touching shapes into disjoint rects that cover the same area.
+
+    The area is cut into the widest possible horizontal strips with a sweep line,
+    then strips of the same width on top of each other are joined.
+
+    >>> merge([Rect[0:2, 0:2], Rect[1:3, 0:2], Rect[3:4, 0:2]])
+    [[0:4, 0:2]]
+
+    >>> merge([Rect[0:4, 0:1], Rect[0:1, 0:4]], 'metal')
+    [[0:4, 0:1] 'metal', [0:1, 1:4] 'metal']
+    """
+    return [Rect.from_edges(*edges, user_data) for edges in _merged_edges(_edges(shapes))]
+
+
+def boolean(
+    first: Iterable[Any], second: Iterable[Any], operation: str, user_data: Any = None
+) -> List[Rect]:
+    """
+    Combine the area of two sets of shapes and return it as disjoint rects.
+
+    The ``operation`` is one of
+
+    * ``'and'``: the area covered by both
+    * ``'or'``: the area covered by any of them
+    * ``'xor'``: the area covered by exactly one of them
+    * ``'not'``: the area covered by the first, but not by the second
+
+    Both sets are swept at once, see :func:`merge`.
+
+    >>> metal = [Rect[0:4, 0:2]]
+    >>> cut = [Rect[1:2, 0:1], Rect[3:5, 1:3]]
+    >>> boolean(metal, cut, 'and')
+    [[1:2, 0:1], [3:4, 1:2]]
+
+    >>> boolean(metal, cut, 'not')
+    [[0:1, 0:1], [2:4, 0:1], [0:3, 1:2]]
+
+    >>> boolean(metal, cut, 'or')
+    [[0:4, 0:1], [0:5, 1:2], [3:5, 2:3]]
+    """
+    assert operation in _OPERATIONS, f"unknown boolean operation {operation!r}"
+    edges = _sweep([_edges(first), _edges(second)], _OPERATIONS[operation])
+    return [Rect.from_edges(*edges, user_data) for edges in edges]
+
+
+def subtract(shapes: Iterable[Any], cutters: Iterable[Any]) -> List[Rect]:
+    """
+    Cut the cutters out of every shape and return the rest as rects, which keep the
+    user data of their shape. The rests of one shape are disjoint.
+
+    The cutters are put into a :class:`SpatialIndex`, so every shape is only cut by
+    the cutters around it. The rest of a shape is swept as a whole, see :func:`boolean`,
+    which gives fewer pieces than cutting with one cutter after the other.
+
+    >>> fill = [Rect[0:10, 0:4, 'metal'], Rect[20:30, 0:4, 'metal']]
+    >>> for rest in subtract(fill, [Rect[2:3, 1:2], Rect[6:7, 1:2]]):
+    ...     print(rest)
+    [0:10, 0:1] 'metal'
+    [0:2, 1:2] 'metal'
+    [3:6, 1:2] 'metal'
+    [7:10, 1:2] 'metal'
+    [0:10, 2:4] 'metal'
+    [20:30, 0:4] 'metal'
+    """
+    index = SpatialIndex.bulk_load(cutters)
+    result: List[Rect] = []
+    for shape in shapes:
+        user_data = getattr(shape, 'user_data', None)
+        nearby = list(index.query(shape))
+        if not nearby:
+            edges = shape.left, shape.right, shape.bottom, shape.top
+            result.append(Rect.from_edges(*edges, user_data))
+        elif len(nearby) == 1:
+            result.extend(Rect.difference(shape, nearby[0]))
+        else:
+            result.extend(boolean([shape], nearby, 'not', user_data))
+    return result
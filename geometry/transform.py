@@ -0,0 +1,159 @@
+from typing import NamedTuple, Tuple
+
+from .point import Number, Point
+
+RectTuple = Tuple[Number, Number, Number, Number]
+
+
+class Transform(NamedTuple):
+    """
+    A placement that is applied to shapes. Groups keep a pending transform for their
+    shapes, so moving, flipping or rotating a group does not have to touch every shape.
+
+    A transform covers all 8 Manhattan orientations, a magnification and an offset.
+    They are applied in this order:
+
+    1. ``mirror``: mirror at the x axis (negate y)
+    2. ``rotation``: rotate counter clockwise by 0, 90, 180 or 270 degrees
+    3. ``magnification``: scale by a factor
+    4. ``dx`` and ``dy``: translate
+
+    >>> Transform(10, 20).point(Point(1, 2))
+    (11, 22)
+
+    >>> Transform(rotation=90).point(Point(1, 2))
+    (-2, 1)
+
+    >>> Transform(mirror=True, magnification=2).point(Point(1, 2))
+    (2, -4)
+
+    Rectangles are given by their center, width and height
+
+    >>> Transform(10, 20, rotation=90).rect(0, 0, 4, 2)
+    (10, 20, 2, 4)
+    """
+
+    dx: Number = 0
+    dy: Number = 0
+    rotation: int = 0
+    mirror: bool = False
+    magnification: Number = 1
+
+    @classmethod
+    def around(cls, center: Point, rotation: int = 0, mirror: bool = False) -> 'Transform':
+        """
+        Create a transform that rotates or mirrors around the given center point.
+
+        >>> Transform.around(Point(1, 1), rotation=180).point(Point(0, 0))
+        (2, 2)
+        """
+        to_origin = Transform(-center.x, -center.y)
+        orientation = Transform(rotation=rotation, mirror=mirror)
+        return to_origin.then(orientation).then(Transform(center.x, center.y))
+
+    @property
+    def is_identity(self) -> bool:
+        """
+        True if the transform does not change anything
+
+        >>> Transform().is_identity
+        True
+        """
+        return self.is_translation and self.dx == 0 and self.dy == 0
+
+    @property
+    def is_translation(self) -> bool:
+        """
+        True if the transform only moves shapes, without changing their orientation
+        or size
+
+        >>> Transform(1, 2).is_translation
+        True
+
+        >>> Transform(rotation=90).is_translation
+        False
+        """
+        return self.rotation == 0 and not self.mirror and self.magnification == 1
+
+    @property
+    def swaps_axes(self) -> bool:
+        """
+        True if horizontal lines become vertical lines and vice versa
+        """
+        return self.rotation in (90, 270)
+
+    def _linear(self, x: Number, y: Number) -> Tuple[Number, Number]:
+        if self.mirror:
+            y = -y
+        rotation = self.rotation
+        if rotation == 90:
+            x, y = -y, x
+        elif rotation == 180:
+            x, y = -x, -y
+        elif rotation == 270:
+            x, y = y, -x
+        magnification = self.magnification
+        if magnification != 1:
+            x, y = x * magnification, y * magnification
+        return x, y
+
+    def vector(self, vector: Point) -> Point:
+        """
+        Transform a direction vector, i.e. ignore the offset.
+
+        >>> Transform(10, 10, rotation=90).vector(Point(1, 0))
+        (0, 1)
+        """
+        return Point(*self._linear(vector.x, vector.y))
+
+    def point(self, point: Point) -> Point:
+        x, y = self._linear(point.x, point.y)
+        return Point(x + self.dx, y + self.dy)
+
+    def rect(self, x: Number, y: Number, width: Number, height: Number) -> RectTuple:
+        """
+        Transform a rect given by its center, width and height
+        """
+        x, y = self._linear(x, y)
+        if self.swaps_axes:
+            width, height = height, width
+        magnification = self.magnification
+        if magnification != 1:
+            width, height = width * magnification, height * magnification
+        return x + self.dx, y + self.dy, width, height
+
+    def then(self, other: 'Transform') -> 'Transform':
+        """
+        Combine two transforms: first apply this one, then the other one
+
+        >>> Transform(1, 2).then(Transform(10, 20))
+        Transform(dx=11, dy=22, rotation=0, mirror=False, magnification=1)
+
+        >>> t = Transform(1, 2, rotation=90).then(Transform(mirror=True, magnification=3))
+        >>> t.point(Point(5, 7)) == Transform(mirror=True, magnification=3).point(
+        ...     Transform(1, 2, rotation=90).point(Point(5, 7)))
+        True
+        """
+        # mirroring at the x axis reverses the direction of the previous rotation
+        rotation = -self.rotation if other.mirror else self.rotation
+        dx, dy = other._linear(self.dx, self.dy)
+        return Transform(
+            dx + other.dx,
+            dy + other.dy,
+            (rotation + other.rotation) % 360,
+            self.mirror != other.mirror,
+            self.magnification * other.magnification,
+        )
+
+    def inverse(self) -> 'Transform':
+        """
+        The transform that undoes this one
+
+        >>> t = Transform(1, 2, rotation=90, mirror=True, magnification=2)
+        >>> t.then(t.inverse()).point(Point(3, 4))
+        (3.0, 4.0)
+        """
+        rotation = self.rotation if self.mirror else (360 - self.rotation) % 360
+        linear = Transform(0, 0, rotation, self.mirror, 1 / self.magnification)
+        dx, dy = linear._linear(self.dx, self.dy)
+        return linear._replace(dx=-dx, dy=-dy)
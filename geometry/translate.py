@@ -1,4 +1,4 @@
-from typing import Any, Union, NamedTuple
+from typing import Any, Union, NamedTuple, Sequence
 
 from .point import Point, Number
 from .handles import TranslateHandle, EdgeHandle
@@ -27,7 +27,19 @@ class Corner(NamedTuple):
         setattr(instance, self.y, value.y)
 
 
+def _split_key(key: str) -> Sequence[str]:
+    """
+    Split a corner name like ``bottom_left`` into the names of its x and y edges.
+    """
+    corner = CanTranslate.__dict__.get(key)
+    if isinstance(corner, Corner):
+        return corner.x, corner.y
+    return (key,)
+
+
 class CanTranslate:
+    __slots__ = ()
+
     x: Number
     y: Number
     width: Number
@@ -64,7 +76,7 @@ class CanTranslate:
 
     @left.setter
     def left(self, value: Number) -> None:
-        self.x += value - self.left
+        self.x += value - self.left  # type: ignore
 
     @property
     def right(self) -> Number:
@@ -86,7 +98,7 @@ class CanTranslate:
 
     @right.setter
     def right(self, value: Number) -> None:
-        self.x += value - self.right
+        self.x += value - self.right  # type: ignore
 
     @property
     def bottom(self) -> Number:
@@ -108,7 +120,7 @@ class CanTranslate:
 
     @bottom.setter
     def bottom(self, value: Number) -> None:
-        self.y += value - self.bottom
+        self.y += value - self.bottom  # type: ignore
 
     @property
     def top(self) -> Number:
@@ -130,7 +142,7 @@ class CanTranslate:
 
     @top.setter
     def top(self, value: Number) -> None:
-        self.y += value - self.top
+        self.y += value - self.top  # type: ignore
 
     def translate(self, **absolute: Union[Number, Point, TranslateHandle]) -> 'CanTranslate':
         """
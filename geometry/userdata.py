@@ -2,14 +2,18 @@ from typing import Any, TypeVar
 from copy import deepcopy, copy
 from dataclasses import dataclass
 
-
 Self = TypeVar('Self', bound='HasUserData')
 
 
 @dataclass
 class HasUserData:
+    __slots__ = ()
+
     user_data: Any = None
 
+    # user data is not part of the geometry, but borrowers must get a copy before it changes
+    _notifying = {'user_data': False}
+
     keep = object()
     shallow_copy = object()
     deep_copy = object()
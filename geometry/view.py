@@ -0,0 +1,68 @@
+from typing import Any, Optional, Union
+from dataclasses import dataclass, field
+
+from .point import Number
+from .rect import Rect
+from .path import Segment, Direction, _direction_of
+from .translate import CanTranslate, int_if_possible as _int
+from .transform import Transform
+
+
+@dataclass(frozen=True)
+class ShapeView(CanTranslate):
+    """
+    A read-only view of a rect or segment somewhere inside a group hierarchy,
+    see :meth:`Group.views`.
+
+    The coordinates are those of the outermost group, i.e. the transforms of all
+    groups in between are already applied. The viewed shape itself is not changed.
+
+    >>> r = Rect[0:2, 0:1, 'metal']
+    >>> view = ShapeView.of(r, Transform(10, 0, rotation=90))
+    >>> view
+    [9:10, 0:2] 'metal'
+    >>> view.shape is r
+    True
+
+    Views cannot be changed
+
+    >>> view.left = 0
+    Traceback (most recent call last):
+    ...
+    dataclasses.FrozenInstanceError: cannot assign to field 'left'
+    """
+
+    x: Number
+    y: Number
+    width: Number
+    height: Number
+    direction: Optional[Direction] = None
+    user_data: Any = None
+    shape: Union[Rect, Segment, None] = field(default=None, compare=False)
+
+    @classmethod
+    def of(cls, shape: Union[Rect, Segment], transform: Transform = Transform()) -> 'ShapeView':
+        """
+        View a shape with a transform applied to it.
+
+        Segments change their direction
+
+        >>> from geometry import Point
+        >>> segment = Segment.from_start_end(Point(0, 0), Point(4, 0), 2)
+        >>> ShapeView.of(segment, Transform(rotation=90))
+        [-1:1, 0:4] (up)
+        """
+        x, y, width, height = transform.rect(shape.x, shape.y, shape.width, shape.height)
+        direction = getattr(shape, 'direction', None)
+        if direction is not None and not transform.is_translation:
+            direction = _direction_of(transform.vector(direction * 1))
+        return cls(x, y, width, height, direction, shape.user_data, shape)
+
+    def __str__(self) -> str:
+        edges = f"[{_int(self.left)}:{_int(self.right)}, {_int(self.bottom)}:{_int(self.top)}]"
+        direction = "" if self.direction is None else f" ({self.direction.name})"
+        user_data = "" if self.user_data is None else f" {self.user_data!r}"
+        return f"{edges}{direction}{user_data}"
+
+    def __repr__(self) -> str:
+        return self.__str__()